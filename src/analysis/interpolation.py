@@ -0,0 +1,217 @@
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy.interpolate import CloughTocher2DInterpolator
+from scipy.sparse import csr_matrix
+from scipy.spatial import Delaunay, QhullError, cKDTree
+
+from analysis.smoothing import DEFAULT_BACKEND, smooth, smooth_nan
+from telemetry.spans import span
+
+MAX_CACHED_SURFACES = 64
+MAX_CACHED_TRIANGULATIONS = 16
+MAX_CACHED_LAYOUTS = 16
+
+_lock = threading.Lock()
+_surfaces = OrderedDict()
+_triangulations = OrderedDict()
+_layouts = OrderedDict()
+
+
+def array_hash(*arrays):
+    digest = hashlib.sha1()
+    for array in arrays:
+        array = np.ascontiguousarray(array, dtype=np.float64)
+        digest.update(str(array.shape).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def _cache_get(cache, key):
+    with _lock:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+    return None
+
+
+def _cache_put(cache, key, value, max_entries):
+    with _lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > max_entries:
+            cache.popitem(last=False)
+    return value
+
+
+def clear_caches():
+    with _lock:
+        _surfaces.clear()
+        _triangulations.clear()
+        _layouts.clear()
+
+
+def interpolation_method(n_points):
+    return "cubic" if n_points >= 4 else ("linear" if n_points >= 3 else "nearest")
+
+
+def triangulate(x_px, y_px):
+    key = array_hash(x_px, y_px)
+    cached = _cache_get(_triangulations, key)
+    if cached is not None:
+        return cached
+
+    try:
+        tri = Delaunay(np.column_stack([x_px, y_px]).astype(np.float64))
+    except (QhullError, ValueError):
+        # Puntos colineales o insuficientes: solo vale "nearest"
+        tri = False
+
+    return _cache_put(_triangulations, key, tri, MAX_CACHED_TRIANGULATIONS)
+
+
+def grid_axes(width, height, resolution):
+    xi = np.linspace(0, width, resolution)
+    yi = np.linspace(0, height, resolution)
+    return xi, yi
+
+
+def build_layout(x_px, y_px, width, height, resolution, method):
+    # Precalculo por disposicion de puntos: vale para cualquier beacon/canal medido
+    # en las mismas posiciones, solo cambian los valores de RSSI
+    key = (array_hash(x_px, y_px), width, height, resolution, method)
+    cached = _cache_get(_layouts, key)
+    if cached is not None:
+        return cached
+
+    xi, yi = grid_axes(width, height, resolution)
+    xi_grid, yi_grid = np.meshgrid(xi, yi)
+    cells = np.column_stack([xi_grid.ravel(), yi_grid.ravel()])
+    points = np.column_stack([x_px, y_px]).astype(np.float64)
+    n_cells, n_points = len(cells), len(points)
+
+    tri = triangulate(x_px, y_px) if method != "nearest" else False
+    if tri is False:
+        method = "nearest"
+
+    layout = {"xi": xi, "yi": yi, "shape": xi_grid.shape, "method": method, "tri": tri}
+
+    if method == "nearest":
+        _, nearest = cKDTree(points).query(cells)
+        layout["weights"] = csr_matrix(
+            (np.ones(n_cells), (np.arange(n_cells), nearest)), shape=(n_cells, n_points),
+        )
+        layout["inside"] = np.ones(n_cells, dtype=bool)
+    elif method == "cubic":
+        # Clough-Tocher solo necesita la triangulacion y las celdas a evaluar
+        layout["cells"] = cells
+    else:
+        # Indices de simplex + coordenadas baricentricas de cada celda
+        simplex = tri.find_simplex(cells)
+        inside = simplex >= 0
+        transform = tri.transform[simplex[inside]]
+        partial = np.einsum("ijk,ik->ij", transform[:, :2], cells[inside] - transform[:, 2])
+        barycentric = np.column_stack([partial, 1 - partial.sum(axis=1)])
+
+        rows = np.repeat(np.flatnonzero(inside), 3)
+        columns = tri.simplices[simplex[inside]].ravel()
+        layout["weights"] = csr_matrix(
+            (barycentric.ravel(), (rows, columns)), shape=(n_cells, n_points),
+        )
+        layout["inside"] = inside
+
+    return _cache_put(_layouts, key, layout, MAX_CACHED_LAYOUTS)
+
+
+def interpolate_layout(layout, values):
+    # values: (n_puntos, n_campos) -> (filas, columnas, n_campos), NaN fuera del casco convexo
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+
+    if layout["method"] == "cubic":
+        # Clough-Tocher no es local (gradientes globales): se reutiliza la
+        # triangulacion y se evaluan todos los campos en una sola llamada
+        interpolator = CloughTocher2DInterpolator(layout["tri"], values, fill_value=np.nan)
+        grid = interpolator(layout["cells"])
+    else:
+        grid = layout["weights"] @ values
+        grid[~layout["inside"]] = np.nan
+
+    return grid.reshape(layout["shape"] + (values.shape[1],))
+
+
+def interpolate_fields(x_px, y_px, values, width, height, resolution, method):
+    layout = build_layout(x_px, y_px, width, height, resolution, method)
+    return layout, interpolate_layout(layout, values)
+
+
+def compute_surface(x_px, y_px, fields, width, height, resolution=300, sigma=10, method=None,
+                    smoothing=DEFAULT_BACKEND, nan_aware=False):
+    # fields[-1] es el RSSI; el resto (p.ej. coordenadas reales) solo se interpola para el hover.
+    # grid_fields se guarda en float32 con los campos en el mismo orden (listo como customdata)
+    fields = np.column_stack(fields).astype(np.float64)
+    method = method or interpolation_method(len(x_px))
+
+    key = (array_hash(x_px, y_px, fields), width, height, resolution, method, sigma, smoothing, nan_aware)
+    cached = _cache_get(_surfaces, key)
+    if cached is not None:
+        return cached
+
+    # Una sola triangulacion y una sola evaluacion para todos los campos
+    with span("interpolate", method=method, resolution=resolution):
+        layout, grid_fields = interpolate_fields(x_px, y_px, fields, width, height, resolution, method)
+
+    # Fuera del casco: relleno con el minimo o, con nan_aware, convolucion normalizada
+    with span("smooth", sigma=sigma, backend=smoothing, nan_aware=nan_aware):
+        if nan_aware:
+            zi_smooth = smooth_nan(grid_fields[..., -1], sigma, smoothing)
+        else:
+            zmin = fields[:, -1].min()
+            zi = np.where(np.isnan(grid_fields[..., -1]), zmin, grid_fields[..., -1])
+            zi_smooth = smooth(zi, sigma, smoothing)
+
+    surface = {
+        "xi": layout["xi"],
+        "yi": layout["yi"],
+        "zi_smooth": zi_smooth,
+        "grid_fields": grid_fields.astype(np.float32),
+        "method": layout["method"],
+    }
+    # Los resultados se comparten entre reruns: solo lectura
+    for value in surface.values():
+        if isinstance(value, np.ndarray):
+            value.setflags(write=False)
+
+    return _cache_put(_surfaces, key, surface, MAX_CACHED_SURFACES)
+
+
+def compute_surfaces(x_px, y_px, values, width, height, resolution=300, sigma=10, method=None,
+                     fill_value=None, smoothing=DEFAULT_BACKEND, nan_aware=False):
+    # Modo por lotes: values (n_puntos, n_superficies), p.ej. una columna por beacon,
+    # todas sobre las mismas posiciones de medida
+    values = np.asarray(values, dtype=np.float64)
+    method = method or interpolation_method(len(x_px))
+
+    layout, grid = interpolate_fields(x_px, y_px, values, width, height, resolution, method)
+    grid = np.moveaxis(grid, -1, 0)
+
+    # Suavizado solo sobre los ejes espaciales
+    if nan_aware:
+        zi_smooth = smooth_nan(grid, sigma, smoothing)
+    else:
+        # Relleno fuera del casco: minimo de cada superficie o un valor comun
+        zmin = np.nanmin(values, axis=0)[:, None, None] if fill_value is None else fill_value
+        zi = np.where(np.isnan(grid), zmin, grid)
+        zi_smooth = smooth(zi, sigma, smoothing)
+
+    return {
+        "xi": layout["xi"],
+        "yi": layout["yi"],
+        "zi_smooth": zi_smooth,
+        "grid_values": grid,
+        "method": layout["method"],
+    }
@@ -0,0 +1,150 @@
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from store.cache import get_derived
+from store.columnar import read_dataset
+
+RADIO_MAP_SUFFIX = ".radiomap.npz"
+
+# RSSI asignado a los beacons no oidos en una posicion o en un escaneo
+MISSING_RSSI = -100.0
+# Lecturas consecutivas de una posicion que forman un escaneo de prueba
+SCAN_SIZE = 20
+
+FINGERPRINT_COLUMNS = ["x", "y", "beacon", "rssi"]
+
+
+def radio_map_path(dataset_path):
+    dataset_path = Path(dataset_path)
+    return dataset_path.with_name(dataset_path.stem + RADIO_MAP_SUFFIX)
+
+
+def _filter(df, channel=None, protocol=None):
+    if channel is not None:
+        df = df[df["channel"] == channel]
+    if protocol is not None:
+        df = df[df["protocol"] == protocol]
+    return df
+
+
+def _index(positions, beacons, fingerprints, missing_rssi):
+    return {
+        "positions": positions,
+        "beacons": beacons,
+        "fingerprints": fingerprints,
+        "missing_rssi": missing_rssi,
+        "tree": cKDTree(fingerprints),
+    }
+
+
+def build_radio_map(df, channel=None, protocol=None, missing_rssi=MISSING_RSSI):
+    # Matriz densa posiciones x beacons con el RSSI medio (float32) e indice KD-tree
+    df = _filter(df, channel, protocol)[FINGERPRINT_COLUMNS].dropna()
+    means = df.groupby(["x", "y", "beacon"], observed=True, sort=True)["rssi"].mean().unstack("beacon")
+
+    positions = means.index.to_frame(index=False).to_numpy(dtype=np.float64)
+    beacons = [str(b) for b in means.columns]
+    fingerprints = means.to_numpy(dtype=np.float32, na_value=missing_rssi)
+
+    return _index(positions, beacons, fingerprints, missing_rssi)
+
+
+def radio_map_size(radio_map):
+    # El KD-tree guarda una copia de las huellas y su permutacion de indices
+    fingerprints = radio_map["fingerprints"]
+    return 2 * fingerprints.nbytes + radio_map["positions"].nbytes + 8 * len(fingerprints)
+
+
+def save_radio_map(radio_map, path):
+    np.savez(
+        path,
+        positions=radio_map["positions"],
+        beacons=np.array(radio_map["beacons"]),
+        fingerprints=radio_map["fingerprints"],
+        missing_rssi=radio_map["missing_rssi"],
+    )
+    return path
+
+
+def read_radio_map(path):
+    with np.load(path) as data:
+        return _index(
+            data["positions"], data["beacons"].tolist(), data["fingerprints"], float(data["missing_rssi"]),
+        )
+
+
+def load_radio_map(dataset_path):
+    # Sidecar precalculado si existe; si no, se construye una vez desde el dataset
+    sidecar = radio_map_path(dataset_path)
+    if sidecar.exists():
+        return get_derived(sidecar, "radio_map", read_radio_map, sizeof=radio_map_size)
+
+    return get_derived(
+        dataset_path, "radio_map",
+        lambda p: build_radio_map(read_dataset(p, columns=FINGERPRINT_COLUMNS)),
+        sizeof=radio_map_size,
+    )
+
+
+def scan_vectors(df, beacons, scan_size=SCAN_SIZE, channel=None, protocol=None, missing_rssi=MISSING_RSSI):
+    # Escaneos de prueba: bloques de scan_size lecturas consecutivas de cada posicion,
+    # promediados por beacon y alineados con las columnas del radio map
+    df = _filter(df, channel, protocol)[FINGERPRINT_COLUMNS].dropna()
+    scan = df.groupby(["x", "y"], sort=False).cumcount() // scan_size
+    means = (
+        df.assign(scan=scan.to_numpy())
+        .groupby(["x", "y", "scan", "beacon"], observed=True, sort=True)["rssi"].mean()
+        .unstack("beacon")
+    )
+    means.columns = means.columns.astype(str)
+    means = means.reindex(columns=beacons)
+
+    positions = means.index.to_frame(index=False)[["x", "y"]].to_numpy(dtype=np.float64)
+    return means.to_numpy(dtype=np.float32, na_value=missing_rssi), positions
+
+
+def locate(radio_map, scans, k=3, weighted=True):
+    # k-NN / WKNN en el espacio de senal: media (ponderada por 1/distancia) de las
+    # posiciones de las k huellas mas cercanas, para todos los escaneos a la vez
+    scans = np.atleast_2d(np.asarray(scans, dtype=np.float32))
+    k = min(k, len(radio_map["positions"]))
+    distances, indices = radio_map["tree"].query(scans, k=k)
+    if k == 1:
+        return radio_map["positions"][indices]
+
+    neighbours = radio_map["positions"][indices]
+    if weighted:
+        weights = 1.0 / (distances + 1e-6)
+    else:
+        weights = np.ones_like(distances)
+    weights /= weights.sum(axis=1, keepdims=True)
+    return np.einsum("nk,nkd->nd", weights, neighbours)
+
+
+def evaluate(radio_map, scans, true_positions, k=3, weighted=True):
+    start = time.perf_counter()
+    estimates = locate(radio_map, scans, k=k, weighted=weighted)
+    elapsed = time.perf_counter() - start
+
+    errors = np.linalg.norm(estimates - true_positions, axis=1)
+    per_position = (
+        pd.DataFrame({"x": true_positions[:, 0], "y": true_positions[:, 1], "error": errors})
+        .groupby(["x", "y"], sort=True)["error"]
+        .agg(scans="count", mean_error="mean", median_error="median", max_error="max")
+        .reset_index()
+    )
+
+    summary = {
+        "scans": len(errors),
+        "k": k,
+        "weighted": weighted,
+        "mean_error": float(errors.mean()) if len(errors) else float("nan"),
+        "median_error": float(np.median(errors)) if len(errors) else float("nan"),
+        "p90_error": float(np.percentile(errors, 90)) if len(errors) else float("nan"),
+        "scans_per_second": len(errors) / elapsed if elapsed > 0 else float("inf"),
+    }
+    return summary, per_position
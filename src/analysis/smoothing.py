@@ -0,0 +1,82 @@
+import numpy as np
+from scipy.ndimage import gaussian_filter, uniform_filter1d
+
+# gaussian: separable truncado (scipy), box: 3 pasadas de media movil, fft: convolucion 2D
+BACKENDS = ["gaussian", "box", "fft"]
+DEFAULT_BACKEND = "gaussian"
+
+TRUNCATE = 4.0
+BOX_PASSES = 3
+# Peso minimo de datos bajo el kernel para dar valor a una celda (convolucion normalizada)
+MIN_WEIGHT = 0.1
+
+
+def _spatial_sigma(ndim, sigma):
+    # Solo se suavizan los dos ultimos ejes (filas, columnas); el resto son lotes
+    return (0,) * (ndim - 2) + (sigma, sigma)
+
+
+def box_width(sigma, passes=BOX_PASSES):
+    # Ancho de caja cuya aplicacion repetida tiene la misma varianza que la gaussiana
+    width = int(np.round(np.sqrt(12 * sigma**2 / passes + 1)))
+    return max(1, width | 1)
+
+
+def gaussian_kernel(sigma, truncate=TRUNCATE):
+    radius = int(truncate * sigma + 0.5)
+    x = np.arange(-radius, radius + 1, dtype=np.float64)
+    kernel = np.exp(-0.5 * (x / sigma) ** 2)
+    return kernel / kernel.sum()
+
+
+def _smooth_box(z, sigma):
+    width = box_width(sigma)
+    for _ in range(BOX_PASSES):
+        z = uniform_filter1d(z, width, axis=-1, mode="reflect")
+        z = uniform_filter1d(z, width, axis=-2, mode="reflect")
+    return z
+
+
+def _smooth_fft(z, sigma):
+    # scipy.signal tarda casi un segundo en importarse: solo si se usa este backend
+    from scipy.signal import fftconvolve
+
+    kernel_1d = gaussian_kernel(sigma)
+    radius = len(kernel_1d) // 2
+    kernel = np.multiply.outer(kernel_1d, kernel_1d).reshape((1,) * (z.ndim - 2) + (len(kernel_1d),) * 2)
+
+    # Bordes en modo reflect (simetrico) igual que gaussian_filter
+    pad = [(0, 0)] * (z.ndim - 2) + [(radius, radius)] * 2
+    padded = np.pad(z, pad, mode="symmetric")
+    smoothed = fftconvolve(padded, kernel, mode="same", axes=(-2, -1))
+    index = tuple(slice(before, before + n) for (before, _), n in zip(pad, z.shape))
+    return smoothed[index]
+
+
+def smooth(z, sigma, backend=DEFAULT_BACKEND):
+    z = np.asarray(z, dtype=np.float64)
+    if sigma <= 0:
+        return z.copy()
+
+    if backend == "gaussian":
+        return gaussian_filter(z, sigma=_spatial_sigma(z.ndim, sigma), truncate=TRUNCATE)
+    if backend == "box":
+        return _smooth_box(z, sigma)
+    if backend == "fft":
+        return _smooth_fft(z, sigma)
+    raise ValueError(f"Unknown smoothing backend: {backend}")
+
+
+def smooth_nan(z, sigma, backend=DEFAULT_BACKEND, min_weight=MIN_WEIGHT):
+    # Convolucion normalizada: las celdas NaN no aportan valor ni peso, asi que las
+    # zonas vacias no arrastran el resultado hacia ningun valor de relleno
+    z = np.asarray(z, dtype=np.float64)
+    valid = ~np.isnan(z)
+
+    values = smooth(np.where(valid, z, 0.0), sigma, backend)
+    weights = smooth(valid.astype(np.float64), sigma, backend)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result = values / weights
+    result[weights < min_weight] = np.nan
+    return result
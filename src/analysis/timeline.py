@@ -0,0 +1,71 @@
+
+import numpy as np
+import pandas as pd
+
+
+def window_frames(df, window, step, time_column="Date_hour"):
+    # Medias de RSSI por posicion en ventanas deslizantes [inicio, inicio + window)
+    # que avanzan de step en step. Las sumas y cuentas se actualizan de forma
+    # incremental: entra el bloque nuevo y sale el que queda fuera de la ventana.
+    window = pd.Timedelta(window)
+    step = pd.Timedelta(step)
+
+    times = pd.to_datetime(df[time_column], errors="coerce")
+    data = df.assign(**{time_column: times}).dropna(
+        subset=[time_column, "Position_x", "Position_y", "RSSI"]
+    )
+
+    if data.empty:
+        return {
+            "positions": np.empty((0, 2)),
+            "starts": [],
+            "ends": [],
+            "means": np.empty((0, 0)),
+            "counts": np.empty((0, 0), dtype=np.int64),
+        }
+
+    codes, uniques = pd.factorize(pd.MultiIndex.from_frame(data[["Position_x", "Position_y"]]))
+    positions = uniques.to_frame(index=False).to_numpy(dtype=np.float64)
+    n_positions = len(positions)
+
+    t0 = data[time_column].min()
+    buckets = ((data[time_column] - t0) // step).to_numpy(dtype=np.int64)
+    n_buckets = int(buckets.max()) + 1
+    window_buckets = max(1, int(round(window / step)))
+
+    # Sumas y cuentas por (bloque de tiempo, posicion)
+    flat = buckets * n_positions + codes
+    rssi = pd.to_numeric(data["RSSI"], errors="coerce").to_numpy(dtype=np.float64)
+    sums = np.bincount(flat, weights=rssi, minlength=n_buckets * n_positions).reshape(n_buckets, n_positions)
+    counts = np.bincount(flat, minlength=n_buckets * n_positions).reshape(n_buckets, n_positions)
+
+    running_sum = np.zeros(n_positions)
+    running_count = np.zeros(n_positions, dtype=np.int64)
+    first_frame = min(window_buckets, n_buckets) - 1
+
+    starts, ends, means, frame_counts = [], [], [], []
+    for b in range(n_buckets):
+        running_sum += sums[b]
+        running_count += counts[b]
+        if b >= window_buckets:
+            running_sum -= sums[b - window_buckets]
+            running_count -= counts[b - window_buckets]
+
+        if b < first_frame:
+            continue
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(running_count > 0, running_sum / running_count, np.nan)
+
+        starts.append(t0 + max(0, b - window_buckets + 1) * step)
+        ends.append(t0 + (b + 1) * step)
+        means.append(mean)
+        frame_counts.append(running_count.copy())
+
+    return {
+        "positions": positions,
+        "starts": starts,
+        "ends": ends,
+        "means": np.vstack(means),
+        "counts": np.vstack(frame_counts),
+    }
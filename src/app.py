@@ -1,12 +1,11 @@
+import importlib
 import logging
 from pathlib import Path
 
 import streamlit as st
 
+from telemetry.spans import enabled_by_env, recording, set_log_path
 from view.components.menu import menu
-from view.pages.file_manager import render as render_file_manager
-from view.pages.home import render as render_home
-from view.pages.dashboard import render as render_dashboard
 
 LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
 
@@ -32,6 +31,16 @@ def get_logger(name, log_dir=None):
     return logger
 
 
+def lazy_page(module_name):
+    # El modulo de la pagina (y sus dependencias: scipy, plotly, PIL...) se importa
+    # la primera vez que se renderiza, no al arrancar la app
+    def render():
+        importlib.import_module(module_name).render()
+
+    render.__name__ = f"render_{module_name.rsplit('.', 1)[-1]}"
+    return render
+
+
 def main():
     project_dir = Path(__file__).resolve().parent.parent
 
@@ -40,18 +49,31 @@ def main():
     log_output.mkdir(parents=True, exist_ok=True)
 
     get_logger("ips_dashboard", log_output)
+    set_log_path(log_output / "metrics.jsonl")
 
     st.set_page_config(page_title="IPS Dashboard", layout="wide")
 
     pages = [
-        st.Page(render_home, title="Home", url_path="home"),
-        st.Page(render_file_manager, title="File Manager", url_path="db_manager"),
-        st.Page(render_dashboard, title="Dashboard", url_path="dashboard"),
+        st.Page(lazy_page("view.pages.home"), title="Home", url_path="home"),
+        st.Page(lazy_page("view.pages.file_manager"), title="File Manager", url_path="db_manager"),
+        st.Page(lazy_page("view.pages.dashboard"), title="Dashboard", url_path="dashboard"),
     ]
 
     selected = menu(pages)
-    if selected is not None:
+    if selected is None:
+        return
+
+    # Spans solo con el panel activo (o IPS_METRICS=1): si no, no se registra nada
+    show_timings = st.sidebar.toggle("Timing panel")
+    if not (show_timings or enabled_by_env()):
+        selected.run()
+        return
+
+    with recording(f"rerun:{selected.url_path}") as spans:
         selected.run()
+    if show_timings:
+        from view.components.timings import render_timings
+        render_timings(spans)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+import argparse
+import json
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.harness import compare, environment, load_results, save_results
+from benchmarks.imports import import_report
+from benchmarks.smoothing import RESOLUTIONS, SIGMAS, run_smoothing_benchmarks
+from benchmarks.stages import run_benchmarks
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmarks of the ETL, aggregation and heatmap stages")
+    parser.add_argument("--positions", type=int, default=100, help="Number of capture positions")
+    parser.add_argument("--beacons", type=int, default=4, help="Number of beacons")
+    parser.add_argument("--readings", type=int, default=20, help="Readings per beacon and position")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage (best is kept)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for the fingerprinting ETL")
+    parser.add_argument("--output", type=Path, help="JSON results file (default: logs/benchmark.json)")
+    parser.add_argument("--baseline", type=Path, help="JSON results to compare against")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2,
+        help="Allowed relative increase over the baseline before reporting a regression (default: 0.2)",
+    )
+    parser.add_argument("--workdir", type=Path, help="Directory for the synthetic data (default: temporary)")
+    parser.add_argument(
+        "--smoothing", action="store_true",
+        help="Also compare the smoothing backends across sigma and resolution values",
+    )
+    parser.add_argument(
+        "--imports", action="store_true",
+        help="Also measure the import time of the app and of each page (python -X importtime)",
+    )
+    parser.add_argument(
+        "--skip-pipeline", action="store_true",
+        help="Skip the ETL, aggregation and heatmap stages (e.g. with --imports only)",
+    )
+    parser.add_argument("--sigmas", type=float, nargs="+", default=SIGMAS, help="Sigmas for --smoothing")
+    parser.add_argument(
+        "--resolutions", type=int, nargs="+", default=RESOLUTIONS, help="Grid resolutions for --smoothing",
+    )
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    logger = logging.getLogger("benchmark")
+
+    project_dir = Path(__file__).resolve().parent.parent
+    output = args.output or project_dir / Path("logs") / "benchmark.json"
+
+    if args.skip_pipeline:
+        results = {"config": {"repeat": args.repeat}, "environment": environment(), "stages": {}}
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            results = run_benchmarks(
+                args.workdir or Path(tmp),
+                n_positions=args.positions, n_beacons=args.beacons, readings=args.readings,
+                repeat=args.repeat, workers=args.workers, logger=logger,
+            )
+
+    if args.imports:
+        results["config"]["imports"] = True
+        results["stages"].update(import_report(repeat=args.repeat, logger=logger))
+
+    if args.smoothing:
+        results["config"].update(sigmas=args.sigmas, resolutions=args.resolutions)
+        results["stages"].update(run_smoothing_benchmarks(
+            args.sigmas, args.resolutions, repeat=args.repeat, logger=logger,
+        ))
+
+    save_results(results, output)
+    logger.info("Results written to %s", output)
+
+    if args.baseline is not None:
+        regressions = compare(results, load_results(args.baseline), tolerance=args.tolerance)
+        print(json.dumps(regressions, indent=2))
+        if regressions:
+            logger.warning("%d regressions against %s", len(regressions), args.baseline)
+            sys.exit(1)
+        logger.info("No regressions against %s", args.baseline)
+
+if __name__ == "__main__":
+    main()
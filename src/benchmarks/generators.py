@@ -0,0 +1,70 @@
+import math
+import random
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from etl.robomap_simulator import CHANNELS, create_schema, grid_beacons, grid_positions, write_capture
+
+
+def grid_shape(n_positions):
+    # Grid lo mas cuadrado posible con al menos n_positions posiciones
+    n_x = math.ceil(math.sqrt(n_positions))
+    n_y = math.ceil(n_positions / n_x)
+    return n_x, n_y
+
+
+def generate_robomap_db(path, n_positions=100, n_beacons=4, readings=20, seed=0, layout_seed=0):
+    # Base de datos con el esquema robomap: una captura por posicion
+    path = Path(path)
+    if path.exists():
+        path.unlink()
+
+    n_x, n_y = grid_shape(n_positions)
+    positions = grid_positions(n_x, n_y)[:n_positions]
+    # La disposicion de beacons es fija por layout_seed; seed solo cambia el ruido
+    beacons = grid_beacons(n_beacons, n_x, n_y, seed=layout_seed)
+    rng = random.Random(seed)
+    start = datetime(2023, 11, 21, 10, 0, 0)
+
+    conn = sqlite3.connect(path)
+    try:
+        create_schema(conn)
+        rows = sum(
+            write_capture(conn, position, beacons, readings, rng, timestamp=start + timedelta(minutes=i))
+            for i, position in enumerate(positions)
+        )
+    finally:
+        conn.close()
+
+    return rows
+
+
+def generate_fingerprint_files(directory, n_positions=100, n_beacons=4, readings=20, seed=0, layout_seed=0):
+    # Un .txt por posicion (x_<x>_y_<y>.txt) con lineas timestamp;beacon;channel;rssi
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for old in directory.glob("*.txt"):
+        old.unlink()
+
+    n_x, n_y = grid_shape(n_positions)
+    positions = grid_positions(n_x, n_y)[:n_positions]
+    # La disposicion de beacons es fija por layout_seed; seed solo cambia el ruido
+    beacons = grid_beacons(n_beacons, n_x, n_y, seed=layout_seed)
+    rng = random.Random(seed)
+    start = datetime(2023, 11, 21, 10, 0, 0)
+
+    rows = 0
+    for i, (x, y) in enumerate(positions):
+        lines = []
+        # Lecturas en orden temporal, intercalando los beacons como en un escaneo real
+        for n in range(readings):
+            timestamp = start + timedelta(minutes=i, milliseconds=100 * n)
+            for mac, (bx, by) in beacons.items():
+                distance = math.hypot(x - bx, y - by)
+                rssi = int(round(-45 - 20 * math.sqrt(distance) + rng.gauss(0, 4)))
+                lines.append(f"{timestamp:%Y-%m-%d %H:%M:%S.%f};{mac};{rng.choice(CHANNELS)};{rssi}")
+        (directory / f"x_{int(x)}_y_{int(y)}.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+        rows += len(lines)
+
+    return rows
@@ -0,0 +1,93 @@
+import json
+import platform
+import time
+import tracemalloc
+from pathlib import Path
+
+# Metricas comparadas con la linea base: en todas, mayor es peor
+METRICS = ["wall_s", "peak_mb", "output_bytes"]
+
+
+def output_size(*paths):
+    total = 0
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            total += sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+        elif path.exists():
+            total += path.stat().st_size
+    return total
+
+
+def measure(func, repeat=1, setup=None):
+    # func() devuelve el tamano de su salida en bytes.
+    # Tiempo: mejor de `repeat` ejecuciones sin trazar; memoria: una ejecucion extra con
+    # tracemalloc (cuenta Python y numpy/pandas, no el pool de Arrow ni SQLite)
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        output_bytes = func()
+        times.append(time.perf_counter() - start)
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "wall_s": round(min(times), 4),
+        "peak_mb": round(peak / 2**20, 2),
+        "output_bytes": int(output_bytes),
+    }
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def save_results(results, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(results, baseline, tolerance=0.2, min_wall_s=0.05):
+    # Regresiones: metricas que empeoran mas de `tolerance` respecto a la linea base.
+    # Los tiempos que siguen siendo muy cortos se ignoran porque son sobre todo ruido
+    regressions = []
+    if results.get("config") != baseline.get("config"):
+        raise ValueError("Results and baseline were run with different configurations")
+
+    for stage, current in results["stages"].items():
+        previous = baseline["stages"].get(stage)
+        if previous is None:
+            continue
+        for metric in METRICS:
+            if metric == "wall_s" and max(previous[metric], current[metric]) < min_wall_s:
+                continue
+            if previous[metric] > 0 and current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append({
+                    "stage": stage,
+                    "metric": metric,
+                    "baseline": previous[metric],
+                    "current": current[metric],
+                    "ratio": round(current[metric] / previous[metric], 3),
+                })
+
+    return regressions
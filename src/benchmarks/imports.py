@@ -0,0 +1,60 @@
+import logging
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+# Arranque de la app y cada pagina (importadas la primera vez que se renderizan)
+MODULES = ["app", "view.pages.home", "view.pages.file_manager", "view.pages.dashboard"]
+# Ya importado por `streamlit run` antes que la app: no cuenta en los tiempos
+PRELOADED = ["streamlit"]
+
+SOURCE_DIR = Path(__file__).resolve().parent.parent
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def import_times(module, preloaded=PRELOADED):
+    # Salida de -X importtime en un proceso limpio: (modulo, self us, acumulado us, profundidad)
+    code = "; ".join(f"import {name}" for name in [*preloaded, module])
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=SOURCE_DIR, check=True,
+    )
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+
+    # Solo las lineas del ultimo import de nivel superior (el modulo medido)
+    starts = [i for i, entry in enumerate(entries[:-1]) if entry[3] == 0]
+    return entries[starts[-1] + 1:] if starts else entries
+
+
+def import_report(modules=MODULES, repeat=3, top=10, logger=None):
+    logger = logger or logging.getLogger(__name__)
+    stages = {}
+
+    for module in modules:
+        # Mejor de `repeat` procesos: la cache de disco domina la primera ejecucion
+        runs = [import_times(module) for _ in range(repeat)]
+        entries = min(runs, key=lambda run: run[-1][2])
+        heaviest = sorted(entries, key=lambda entry: entry[1], reverse=True)[:top]
+
+        stages[f"import_{module}"] = {
+            "wall_s": round(entries[-1][2] / 1e6, 4),
+            "peak_mb": 0.0,
+            "output_bytes": 0,
+            "modules": len(entries),
+            "top": [{"module": name, "self_s": round(self_us / 1e6, 4)} for name, self_us, _, _ in heaviest],
+        }
+        logger.info(
+            "import %s: %.3f s, %d modules (heaviest: %s)",
+            module, stages[f"import_{module}"]["wall_s"], len(entries),
+            ", ".join(f"{name} {self_us / 1e3:.0f} ms" for name, self_us, _, _ in heaviest[:3]),
+        )
+
+    return stages
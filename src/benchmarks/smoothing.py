@@ -0,0 +1,48 @@
+import logging
+
+import numpy as np
+
+from analysis.smoothing import BACKENDS, smooth, smooth_nan
+from benchmarks.harness import measure
+
+SIGMAS = [2, 5, 10, 20]
+RESOLUTIONS = [150, 300, 600]
+
+
+def synthetic_grid(resolution, seed=0):
+    # Superficie suave con ruido y un cuarto del grid vacio (fuera del casco convexo)
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:1:resolution * 1j, 0:1:resolution * 1j]
+    z = -50 - 30 * np.hypot(xx - 0.3, yy - 0.4) + rng.normal(0, 2, (resolution, resolution))
+    z[(xx > 0.7) & (yy > 0.6)] = np.nan
+    return z
+
+
+def run_smoothing_benchmarks(sigmas=SIGMAS, resolutions=RESOLUTIONS, repeat=3, logger=None):
+    # Tiempo y memoria de cada backend, y error maximo frente a gaussian_filter
+    logger = logger or logging.getLogger(__name__)
+    stages = {}
+
+    for resolution in resolutions:
+        z = synthetic_grid(resolution)
+        filled = np.where(np.isnan(z), np.nanmin(z), z)
+
+        for sigma in sigmas:
+            reference = smooth(filled, sigma, "gaussian")
+            reference_nan = smooth_nan(z, sigma, "gaussian")
+
+            for backend in BACKENDS:
+                for nan_aware in (False, True):
+                    name = f"smooth_{backend}{'_nan' if nan_aware else ''}_s{sigma}_r{resolution}"
+                    if nan_aware:
+                        func, expected = (lambda b=backend, s=sigma: smooth_nan(z, s, b)), reference_nan
+                    else:
+                        func, expected = (lambda b=backend, s=sigma: smooth(filled, s, b)), reference
+
+                    result = func()
+                    stages[name] = measure(lambda f=func: f().nbytes, repeat=repeat)
+                    with np.errstate(invalid="ignore"):
+                        stages[name]["max_error"] = float(np.nanmax(np.abs(result - expected)))
+                    logger.info("%s: %s", name, stages[name])
+
+    return stages
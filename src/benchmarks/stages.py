@@ -0,0 +1,137 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from analysis.interpolation import clear_caches
+from analysis.positioning import build_radio_map, locate, scan_vectors
+from benchmarks.generators import generate_fingerprint_files, generate_robomap_db
+from benchmarks.harness import environment, measure, output_size
+from etl import etl_demo_database, etl_robomap_db
+from store.columnar import read_dataset
+from store.cube import (
+    DIMENSIONS,
+    POSITION,
+    build_cube,
+    build_cube_from_histogram,
+    cube_slice,
+    index_cube,
+    reception_counts,
+    rssi_histogram,
+)
+from store.ingest import ingest_csv
+from view.components.heatmap import create_heatmap, figure_payload_size
+
+
+def _remove(*paths):
+    for path in paths:
+        if path.exists():
+            path.unlink()
+
+
+def run_benchmarks(workdir, n_positions=100, n_beacons=4, readings=20, repeat=3, workers=1, logger=None):
+    logger = logger or logging.getLogger(__name__)
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    config = {
+        "positions": n_positions,
+        "beacons": n_beacons,
+        "readings": readings,
+        "repeat": repeat,
+        "workers": workers,
+    }
+
+    # Datos sinteticos (no se miden)
+    db_path = workdir / "robomap.sqlite3"
+    txt_dir = workdir / "fingerprint"
+    rows = generate_robomap_db(db_path, n_positions, n_beacons, readings)
+    generate_fingerprint_files(txt_dir, n_positions, n_beacons, readings)
+    config["rows"] = rows
+    logger.info("Synthetic data: %d rows, %d positions, %d beacons", rows, n_positions, n_beacons)
+
+    csv_path = workdir / "robomap.csv"
+    chunked_path = workdir / "robomap_chunked.csv"
+    arrow_path = workdir / "robomap_ingest.arrow"
+    fingerprint_out = workdir / "fingerprint_out"
+    fingerprint_out.mkdir(exist_ok=True)
+
+    def sidecars(path):
+        return [path.with_suffix(s) for s in (".cube", ".hist", ".recv")]
+
+    stages = {}
+
+    def run(name, func, setup=None):
+        stages[name] = measure(func, repeat=repeat, setup=setup)
+        logger.info("%s: %s", name, stages[name])
+
+    def robomap_etl():
+        etl_robomap_db.etl(db_path, csv_path)
+        return output_size(csv_path, *sidecars(csv_path))
+
+    def robomap_etl_chunked():
+        etl_robomap_db.etl(db_path, chunked_path, chunk_captures=max(1, n_positions // 10))
+        return output_size(chunked_path, *sidecars(chunked_path))
+
+    def fingerprint_etl():
+        etl_demo_database.etl(txt_dir, fingerprint_out, workers=workers)
+        return output_size(fingerprint_out / (txt_dir.name + ".csv"))
+
+    run("etl_robomap_db", robomap_etl)
+    run("etl_robomap_db_chunked", robomap_etl_chunked)
+    run("etl_demo_database", fingerprint_etl)
+
+    # Radio map de fingerprinting: calibracion = salida del ETL, prueba = otra pasada con otro ruido
+    test_dir = workdir / "fingerprint_test"
+    generate_fingerprint_files(test_dir, n_positions, n_beacons, readings, seed=1)
+    calibration = pd.read_csv(fingerprint_out / (txt_dir.name + ".csv"))
+    test = pd.concat(etl_demo_database.process_files(sorted(test_dir.glob("*.txt"))), ignore_index=True)
+
+    radio_map = build_radio_map(calibration)
+    scans, _ = scan_vectors(test, radio_map["beacons"])
+    run("build_radio_map", lambda: build_radio_map(calibration)["fingerprints"].nbytes)
+    run("locate_wknn", lambda: locate(radio_map, scans, k=3).nbytes)
+    stages["locate_wknn"]["scans"] = len(scans)
+
+    def ingest():
+        with open(csv_path, "rb") as source:
+            ingest_csv(source, arrow_path)
+        return output_size(arrow_path, *sidecars(arrow_path))
+
+    run("ingest_csv", ingest, setup=lambda: _remove(arrow_path, *sidecars(arrow_path)))
+
+    # Agregaciones sobre el dataset ya cargado en memoria
+    df = read_dataset(arrow_path)
+
+    def groupby_mean():
+        means = df.groupby(DIMENSIONS + POSITION, observed=True)["RSSI"].mean()
+        return means.memory_usage(deep=True)
+
+    run("groupby_mean", groupby_mean)
+    run("build_cube", lambda: build_cube(df).memory_usage(deep=True).sum())
+
+    histogram = rssi_histogram(df)
+    reception = reception_counts(df)
+    run("rssi_histogram", lambda: rssi_histogram(df).memory_usage(deep=True))
+    run(
+        "build_cube_from_histogram",
+        lambda: build_cube_from_histogram(histogram, reception).memory_usage(deep=True).sum(),
+    )
+
+    # Heatmap del primer (Mac, Channel, Protocol): en frio y con las caches de interpolacion
+    cube = index_cube(build_cube_from_histogram(histogram, reception))
+    mac, channel, protocol = cube.index[0][:3]
+    points = cube_slice(cube, mac, channel, protocol)[["Position_x", "Position_y", "mean"]].to_numpy(np.float64)
+
+    def heatmap(compact):
+        return figure_payload_size(create_heatmap(points, compact=compact))["total"]
+
+    run("create_heatmap", lambda: heatmap(False), setup=clear_caches)
+    run("create_heatmap_compact", lambda: heatmap(True), setup=clear_caches)
+    run("create_heatmap_cached", lambda: heatmap(True))
+
+    return {
+        "config": config,
+        "environment": environment(),
+        "created": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "stages": stages,
+    }
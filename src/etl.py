@@ -1,8 +1,10 @@
 
+import argparse
 import logging
 from pathlib import Path
 
 from etl.etl_demo_database import etl
+from telemetry.spans import enabled_by_env, recording, set_log_path
 
 LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
 
@@ -26,7 +28,26 @@ def get_logger(name, log_dir=None):
 
     return logger
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fingerprinting ETL")
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Number of worker processes used to parse the input files (default: 1)",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Only process new input files and append them to the existing output "
+             "(rebuilt instead when a new file sorts before the exported ones)",
+    )
+    parser.add_argument(
+        "--metrics", action="store_true",
+        help="Record stage timings to logs/metrics.jsonl (also enabled with IPS_METRICS=1)",
+    )
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+
     project_dir = Path(__file__).resolve().parent.parent
 
     # Set up logging
@@ -41,7 +62,14 @@ def main():
     
     # Run ETL process
     etl_logger = get_logger("etl", log_output)
-    etl(database, output, logger=etl_logger)
+    if not (args.metrics or enabled_by_env()):
+        etl(database, output, logger=etl_logger, workers=args.workers, incremental=args.incremental)
+        return
+
+    set_log_path(log_output / "metrics.jsonl")
+    with recording("etl") as spans:
+        etl(database, output, logger=etl_logger, workers=args.workers, incremental=args.incremental)
+    etl_logger.info("Stage timings: %s", {s["name"]: s["duration_s"] for s in spans})
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,12 @@
 
 import re
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 
+from etl.manifest import diff_files, load_manifest, manifest_path, save_manifest
+from telemetry.spans import span
+
 def read_txt(path):
     content = pd.read_csv(path, sep=";", header=None, names=["timestamp", "beacon", "channel", "rssi"])
     return path.stem, content
@@ -19,19 +24,62 @@ def transform_database(filename, content):
 
     return content
 
-def etl(input_path, output_path, logger=None):
-    
-    df_parts = []
-    
-    for txt_file in input_path.glob("*.txt"):
-        
-        filename, content = read_txt(txt_file)
-        transformed_data = transform_database(filename, content)
-        df_parts.append(transformed_data)
+def process_file(txt_file):
+    filename, content = read_txt(txt_file)
+    return transform_database(filename, content)
+
+def process_files(txt_files, workers=1):
+    if workers is not None and workers > 1:
+        chunksize = max(1, len(txt_files) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(process_file, txt_files, chunksize=chunksize))
+
+    return [process_file(txt_file) for txt_file in txt_files]
+
+def etl(input_path, output_path, logger=None, workers=1, incremental=False):
     
-    df = pd.concat(df_parts, ignore_index=True)
+    # Orden determinista por nombre de fichero (igual en serie y en paralelo)
+    txt_files = sorted(input_path.glob("*.txt"), key=lambda p: p.name)
     output_file = output_path / (input_path.name + ".csv")
 
-    df.to_csv(output_file, index=False)
+    # Los hashes solo se calculan en modo incremental, que es quien usa el manifiesto
+    manifest, entries = None, None
+    if incremental:
+        manifest = load_manifest(output_file)
+        with span("diff_files", files=len(txt_files)):
+            new, changed, removed, entries = diff_files(txt_files, manifest["files"] if manifest else {})
+
+    # Anadir al final solo conserva el orden por nombre (el de una reconstruccion
+    # completa) si todos los ficheros nuevos van detras de los ya exportados
+    if (
+        manifest is not None and not changed and not removed
+        and all(path.name > max(manifest["files"], default="") for path in new)
+    ):
+        if new:
+            with span("process_files", files=len(new), workers=workers):
+                df = pd.concat(process_files(new, workers), ignore_index=True)
+            with span("write_csv", rows=len(df)):
+                df.to_csv(output_file, mode="a", header=False, index=False)
+        save_manifest(output_file, {"files": entries})
+        if logger is not None:
+            logger.info("Incremental update of %s: %d new files appended", output_file, len(new))
+        return
+
+    if manifest is not None and logger is not None:
+        logger.info(
+            "%d new, %d changed and %d removed files since last run, rebuilding %s",
+            len(new), len(changed), len(removed), output_file,
+        )
+
+    with span("process_files", files=len(txt_files), workers=workers):
+        df = pd.concat(process_files(txt_files, workers), ignore_index=True)
+
+    with span("write_csv", rows=len(df)):
+        df.to_csv(output_file, index=False)
+    if entries is not None:
+        save_manifest(output_file, {"files": entries})
+    else:
+        # Un manifiesto anterior ya no describe el CSV reescrito
+        manifest_path(output_file).unlink(missing_ok=True)
     if logger is not None:
-        logger.info("Data written to %s", output_file)
+        logger.info("Data written to %s (%d files, %s workers)", output_file, len(txt_files), workers)
@@ -1,41 +1,51 @@
 
 import sqlite3
+import time
 import pandas as pd
 
+from etl.manifest import load_manifest, save_manifest
+from telemetry.spans import span
+from store.cube import (
+    empty_histogram, merge_histograms, read_histogram, read_reception, reception_counts,
+    rssi_histogram, write_cube,
+)
+
+
+SELECT_QUERY = """
+    SELECT
+        b.Id AS Beacon_Id,
+        b.Id_capture,
+        b.N_reading,
+        b.Date_hour,
+        b.Mac,
+        b.Pack_size,
+        b.Channel,
+        b.RSSI,
+        b.PDU_type,
+        b.CRC,
+        b.Protocol,
+        b.Identificator,
+
+        c.Date,
+        c.Light,
+        c.Temperature,
+        c.Relative_humidity,
+        c.Absolute_humidity,
+        c.Position_x,
+        c.Position_y,
+        c.Position_z,
+        c.Platform_angle,
+        c.Dongle_rotation
+    FROM Beacon_BLE_Signal b
+    JOIN Capture c
+        ON b.Id_capture = c.Id
+    """
+
 
 def read_database(input_db, logger=None):
     try:
         conn = sqlite3.connect(input_db)
-        query = """
-            SELECT
-                b.Id AS Beacon_Id,
-                b.Id_capture,
-                b.N_reading,
-                b.Date_hour,
-                b.Mac,
-                b.Pack_size,
-                b.Channel,
-                b.RSSI,
-                b.PDU_type,
-                b.CRC,
-                b.Protocol,
-                b.Identificator,
-
-                c.Date,
-                c.Light,
-                c.Temperature,
-                c.Relative_humidity,
-                c.Absolute_humidity,
-                c.Position_x,
-                c.Position_y,
-                c.Position_z,
-                c.Platform_angle,
-                c.Dongle_rotation
-            FROM Beacon_BLE_Signal b
-            JOIN Capture c
-                ON b.Id_capture = c.Id;
-
-            """
+        query = SELECT_QUERY + ";"
 
         df = pd.read_sql(query, conn)
         conn.close()
@@ -50,6 +60,45 @@ def read_database(input_db, logger=None):
     return df
 
 
+def read_database_chunks(input_db, chunk_captures=100, logger=None):
+    conn = sqlite3.connect(input_db)
+    try:
+        indexed = any(
+            row[2] == "Id_capture"
+            for index in conn.execute("PRAGMA index_list(Beacon_BLE_Signal)").fetchall()
+            for row in conn.execute(f"PRAGMA index_info('{index[1]}')").fetchall()
+            if row[0] == 0
+        )
+        if not indexed and logger is not None:
+            logger.warning("Beacon_BLE_Signal has no index on Id_capture, chunked reads will be slow")
+
+        query = SELECT_QUERY + " WHERE b.Id_capture BETWEEN ? AND ? ORDER BY b.Id_capture, b.Id;"
+
+        # Paginacion por clave: bloques de capturas consecutivas
+        last_capture = None
+        while True:
+            if last_capture is None:
+                ids = conn.execute(
+                    "SELECT Id FROM Capture ORDER BY Id LIMIT ?", (chunk_captures,)
+                ).fetchall()
+            else:
+                ids = conn.execute(
+                    "SELECT Id FROM Capture WHERE Id > ? ORDER BY Id LIMIT ?",
+                    (last_capture, chunk_captures),
+                ).fetchall()
+            if not ids:
+                break
+
+            first_capture, last_capture = ids[0][0], ids[-1][0]
+            yield pd.read_sql(query, conn, params=(first_capture, last_capture))
+    except Exception as e:
+        if logger is not None:
+            logger.error("Error reading database: %s", e)
+        raise e
+    finally:
+        conn.close()
+
+
 def transform_data(df, logger=None):
     # Convertir timestamp a formato datetime
     df["Date_hour"] = pd.to_datetime(df["Date_hour"], errors="coerce")
@@ -64,13 +113,139 @@ def transform_data(df, logger=None):
     return df
 
 
-def etl(input_db, output_csv, logger=None):
-    dataframe = read_database(input_db, logger=logger)
-    transformed_df = transform_data(dataframe, logger=logger)
-    transformed_df.to_csv(output_csv, index=False)
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        # No disponible en Windows
+        return None
+
+    # ru_maxrss en KB (Linux)
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def etl_chunked(input_db, output_csv, chunk_captures=100, logger=None):
+    start = time.perf_counter()
+    total_rows = 0
+    histogram = None
+    reception = None
+    high_water_mark = 0
+
+    for i, chunk in enumerate(read_database_chunks(input_db, chunk_captures, logger=logger)):
+        with span("transform", chunk=i, rows=len(chunk)):
+            transformed = transform_data(chunk)
+        with span("write_csv", chunk=i):
+            transformed.to_csv(output_csv, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+
+        with span("aggregate", chunk=i):
+            histogram = merge_histograms(histogram, rssi_histogram(transformed))
+            # Los chunks son capturas completas: los conteos de recepcion se pueden sumar
+            reception = merge_histograms(reception, reception_counts(transformed))
+        total_rows += len(transformed)
+        if len(transformed):
+            high_water_mark = max(high_water_mark, int(transformed["Beacon_Id"].max()))
+
+        if logger is not None:
+            elapsed = time.perf_counter() - start
+            logger.info(
+                "Chunk %d: %d rows (%.0f rows/s, peak RSS %s MB)",
+                i, len(transformed), total_rows / elapsed if elapsed > 0 else 0.0, _peak_rss_mb(),
+            )
+
+    elapsed = time.perf_counter() - start
+    if logger is not None:
+        logger.info(
+            "Data written to %s: %d rows in %.1f s (%.0f rows/s, peak RSS %s MB)",
+            output_csv, total_rows, elapsed, total_rows / elapsed if elapsed > 0 else 0.0, _peak_rss_mb(),
+        )
+
+    # Sin chunks se escribe un cubo vacio, igual que en el modo completo
+    if histogram is None:
+        histogram = empty_histogram()
+    with span("write_cube"):
+        cube_file = write_cube(None, output_csv, histogram=histogram, reception=reception)
+    if logger is not None:
+        logger.info("RSSI cube written to %s", cube_file)
+
+    save_manifest(output_csv, {"source": str(input_db), "high_water_mark": high_water_mark})
+
+    return total_rows
+
+
+def read_database_delta(input_db, high_water_mark, logger=None):
+    conn = sqlite3.connect(input_db)
+    try:
+        query = SELECT_QUERY + " WHERE b.Id > ? ORDER BY b.Id;"
+        df = pd.read_sql(query, conn, params=(high_water_mark,))
+    except Exception as e:
+        if logger is not None:
+            logger.error("Error reading database: %s", e)
+        raise e
+    finally:
+        conn.close()
+
+    if logger is not None:
+        logger.info("New rows read from database: %d rows after Id %d", len(df), high_water_mark)
+
+    return df
+
+
+def etl_incremental(input_db, output_csv, logger=None):
+    manifest = load_manifest(output_csv)
+    histogram = read_histogram(output_csv)
+    reception = read_reception(output_csv)
+
+    if manifest is None or histogram is None or reception is None or manifest.get("source") != str(input_db):
+        if logger is not None:
+            logger.info("No previous export of %s found, running full ETL", input_db)
+        return etl(input_db, output_csv, logger=logger)
+
+    high_water_mark = manifest["high_water_mark"]
+    transformed_df = transform_data(read_database_delta(input_db, high_water_mark, logger=logger))
+
+    if len(transformed_df):
+        transformed_df.to_csv(output_csv, mode="a", header=False, index=False)
+        histogram = merge_histograms(histogram, rssi_histogram(transformed_df))
+        reception = merge_histograms(reception, reception_counts(transformed_df))
+        write_cube(None, output_csv, histogram=histogram, reception=reception)
+        high_water_mark = int(transformed_df["Beacon_Id"].max())
+
+    save_manifest(output_csv, {"source": str(input_db), "high_water_mark": high_water_mark})
+    if logger is not None:
+        logger.info("Incremental update of %s: %d rows appended", output_csv, len(transformed_df))
+
+    return len(transformed_df)
+
+
+def etl(input_db, output_csv, logger=None, chunk_captures=None, incremental=False):
+    if incremental:
+        return etl_incremental(input_db, output_csv, logger=logger)
+
+    if chunk_captures is not None:
+        return etl_chunked(input_db, output_csv, chunk_captures=chunk_captures, logger=logger)
+
+    with span("read_database"):
+        dataframe = read_database(input_db, logger=logger)
+    with span("transform", rows=len(dataframe)):
+        transformed_df = transform_data(dataframe, logger=logger)
+    with span("write_csv"):
+        transformed_df.to_csv(output_csv, index=False)
     if logger is not None:
         logger.info("Data written to %s", output_csv)
 
+    with span("write_cube"):
+        cube_file = write_cube(
+            None, output_csv,
+            histogram=rssi_histogram(transformed_df), reception=reception_counts(transformed_df),
+        )
+    if logger is not None:
+        logger.info("RSSI cube written to %s", cube_file)
+
+    high_water_mark = int(transformed_df["Beacon_Id"].max()) if len(transformed_df) else 0
+    save_manifest(output_csv, {"source": str(input_db), "high_water_mark": high_water_mark})
+
+    return len(transformed_df)
+
 if __name__ == "__main__":
     db_file = r"C:\Users\usuario\Documents\ALBERTO\IPS\ips_dashboard\data\input\prueba_lab_4_12_t1.sqlite3"
     output_csv = r"C:\Users\usuario\Documents\ALBERTO\IPS\ips_dashboard\data\output\prueba_lab_4_12_t1.csv"
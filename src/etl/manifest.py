@@ -0,0 +1,68 @@
+
+import hashlib
+import json
+from pathlib import Path
+
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+def manifest_path(output_file):
+    output_file = Path(output_file)
+    return output_file.with_name(output_file.name + MANIFEST_SUFFIX)
+
+
+def load_manifest(output_file):
+    path = manifest_path(output_file)
+    if not path.exists() or not Path(output_file).exists():
+        return None
+
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(output_file, manifest):
+    path = manifest_path(output_file)
+    tmp_path = path.with_name(path.name + ".tmp")
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    tmp_path.replace(path)
+
+
+def file_hash(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_entry(path, previous=None):
+    stat = Path(path).stat()
+    entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    # Solo se recalcula el hash si cambia tamano o fecha de modificacion
+    if previous is not None and all(previous.get(k) == entry[k] for k in entry):
+        entry["sha256"] = previous["sha256"]
+    else:
+        entry["sha256"] = file_hash(path)
+
+    return entry
+
+
+def diff_files(paths, manifest_files):
+    new, changed, entries = [], [], {}
+
+    for path in paths:
+        previous = manifest_files.get(path.name)
+        entry = file_entry(path, previous)
+        entries[path.name] = entry
+        if previous is None:
+            new.append(path)
+        elif previous["sha256"] != entry["sha256"]:
+            changed.append(path)
+
+    names = {path.name for path in paths}
+    removed = [name for name in manifest_files if name not in names]
+
+    return new, changed, removed, entries
@@ -0,0 +1,134 @@
+
+import argparse
+import random
+import sqlite3
+import time
+from datetime import datetime
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS Capture (
+        Id INTEGER PRIMARY KEY AUTOINCREMENT,
+        Date TEXT,
+        Light REAL,
+        Temperature REAL,
+        Relative_humidity REAL,
+        Absolute_humidity REAL,
+        Position_x REAL,
+        Position_y REAL,
+        Position_z REAL,
+        Platform_angle REAL,
+        Dongle_rotation REAL
+    );
+
+    CREATE TABLE IF NOT EXISTS Beacon_BLE_Signal (
+        Id INTEGER PRIMARY KEY AUTOINCREMENT,
+        Id_capture INTEGER REFERENCES Capture(Id),
+        N_reading INTEGER,
+        Date_hour TEXT,
+        Mac TEXT,
+        Pack_size INTEGER,
+        Channel INTEGER,
+        RSSI INTEGER,
+        PDU_type TEXT,
+        CRC TEXT,
+        Protocol TEXT,
+        Identificator TEXT
+    );
+    """
+
+CHANNELS = [37, 38, 39]
+
+
+def create_schema(conn):
+    conn.executescript(SCHEMA)
+    conn.commit()
+
+
+def write_capture(conn, position, beacons, readings, rng, timestamp=None):
+    # Inserta una captura en (x, y) con `readings` lecturas por beacon,
+    # RSSI decreciente con la distancia a cada beacon
+    timestamp = timestamp or datetime.now()
+    x, y = position
+
+    cursor = conn.execute(
+        """
+        INSERT INTO Capture (Date, Light, Temperature, Relative_humidity, Absolute_humidity,
+                             Position_x, Position_y, Position_z, Platform_angle, Dongle_rotation)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (timestamp.strftime("%Y-%m-%d"), 300.0, 21.0, 45.0, 8.0, x, y, 0.0, 0.0, 0.0),
+    )
+    capture_id = cursor.lastrowid
+
+    rows = []
+    for mac, (bx, by) in beacons.items():
+        distance = ((x - bx) ** 2 + (y - by) ** 2) ** 0.5
+        for n in range(readings):
+            rssi = int(round(-45 - 20 * (distance ** 0.5) + rng.gauss(0, 4)))
+            rows.append((
+                capture_id, n, timestamp.strftime("%Y-%m-%d %H:%M:%S"), mac, 37,
+                rng.choice(CHANNELS), rssi, "ADV_IND", "OK", "BLE4", mac,
+            ))
+
+    conn.executemany(
+        """
+        INSERT INTO Beacon_BLE_Signal (Id_capture, N_reading, Date_hour, Mac, Pack_size,
+                                       Channel, RSSI, PDU_type, CRC, Protocol, Identificator)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
+    conn.commit()
+
+    return len(rows)
+
+
+def grid_positions(n_x, n_y, spacing=1.0):
+    return [(i * spacing, j * spacing) for j in range(n_y) for i in range(n_x)]
+
+
+def grid_beacons(n_beacons, n_x, n_y, spacing=1.0, seed=0):
+    rng = random.Random(seed)
+    return {
+        f"P{i + 1}": (rng.uniform(0, (n_x - 1) * spacing), rng.uniform(0, (n_y - 1) * spacing))
+        for i in range(n_beacons)
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Simulated robomap logger: keeps appending captures to a SQLite database",
+    )
+    parser.add_argument("database", help="Output .sqlite3 file (created if missing)")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between captures")
+    parser.add_argument("--readings", type=int, default=20, help="Readings per beacon and capture")
+    parser.add_argument("--beacons", type=int, default=4, help="Number of beacons")
+    parser.add_argument("--grid", type=int, nargs=2, default=[5, 4], help="Survey grid size (nx ny)")
+    parser.add_argument("--captures", type=int, default=0, help="Stop after N captures (0 = forever)")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+
+    conn = sqlite3.connect(args.database)
+    create_schema(conn)
+
+    positions = grid_positions(*args.grid)
+    beacons = grid_beacons(args.beacons, *args.grid, seed=args.seed)
+
+    written = 0
+    while args.captures == 0 or written < args.captures:
+        position = positions[written % len(positions)]
+        rows = write_capture(conn, position, beacons, args.readings, rng)
+        written += 1
+        print(f"Capture {written} at {position}: {rows} readings", flush=True)
+        time.sleep(args.interval)
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
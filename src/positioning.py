@@ -0,0 +1,57 @@
+import argparse
+import json
+import logging
+from pathlib import Path
+
+from analysis.positioning import (
+    SCAN_SIZE,
+    build_radio_map,
+    evaluate,
+    radio_map_path,
+    save_radio_map,
+    scan_vectors,
+)
+from store.columnar import read_dataset
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fingerprint radio map: k-NN/WKNN positioning evaluation")
+    parser.add_argument("calibration", type=Path, help="Calibration dataset (fingerprinting ETL output)")
+    parser.add_argument("test", type=Path, nargs="?", help="Test dataset to evaluate against the radio map")
+    parser.add_argument("--k", type=int, default=3, help="Number of neighbours (default: 3)")
+    parser.add_argument("--unweighted", action="store_true", help="Plain k-NN instead of WKNN")
+    parser.add_argument("--scan-size", type=int, default=SCAN_SIZE, help="Readings per test scan")
+    parser.add_argument("--channel", type=int, help="Only use readings from this channel")
+    parser.add_argument("--save-map", action="store_true", help="Write the radio map next to the calibration file")
+    parser.add_argument("--output", type=Path, help="CSV with the error per test position")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    logger = logging.getLogger("positioning")
+
+    radio_map = build_radio_map(read_dataset(args.calibration), channel=args.channel)
+    logger.info(
+        "Radio map: %d positions x %d beacons", len(radio_map["positions"]), len(radio_map["beacons"]),
+    )
+    if args.save_map:
+        path = save_radio_map(radio_map, radio_map_path(args.calibration))
+        logger.info("Radio map written to %s", path)
+
+    if args.test is None:
+        return
+
+    scans, true_positions = scan_vectors(
+        read_dataset(args.test), radio_map["beacons"], scan_size=args.scan_size, channel=args.channel,
+    )
+    summary, per_position = evaluate(radio_map, scans, true_positions, k=args.k, weighted=not args.unweighted)
+    print(json.dumps(summary, indent=2))
+
+    if args.output is not None:
+        per_position.to_csv(args.output, index=False)
+        logger.info("Error per position written to %s", args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from store.columnar import read_dataset
+
+# Presupuesto de memoria compartido por todas las sesiones (MB)
+DEFAULT_BUDGET_MB = 1024
+
+# Logger configurado en app.py (consola y logs/ips_dashboard.log)
+logger = logging.getLogger("ips_dashboard")
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+_budget_bytes = int(os.environ.get("IPS_DATASET_CACHE_MB", DEFAULT_BUDGET_MB)) * 1024 * 1024
+_used_bytes = 0
+
+
+def _file_key(path):
+    path = Path(path).resolve()
+    stat = path.stat()
+    return str(path), stat.st_mtime_ns, stat.st_size
+
+
+def _drop(key):
+    global _used_bytes
+    _, size = _entries.pop(key)
+    _used_bytes -= size
+
+
+def _evict(budget_bytes):
+    while _entries and _used_bytes > budget_bytes:
+        key = next(iter(_entries))
+        _drop(key)
+        logger.info("Dataset cache evicted: %s", key[0])
+
+
+def set_budget(megabytes):
+    global _budget_bytes
+    with _lock:
+        _budget_bytes = int(megabytes * 1024 * 1024)
+        _evict(_budget_bytes)
+
+
+def cache_usage():
+    with _lock:
+        return {
+            "entries": len(_entries),
+            "used_bytes": _used_bytes,
+            "budget_bytes": _budget_bytes,
+        }
+
+
+def invalidate(path=None):
+    with _lock:
+        if path is None:
+            for key in list(_entries):
+                _drop(key)
+            return
+
+        path = str(Path(path).resolve())
+        for key in [k for k in _entries if k[0] == path]:
+            _drop(key)
+
+
+def _frame_size(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def get_derived(path, name, build, sizeof=_frame_size):
+    # sizeof: bytes ocupados por el valor construido (por defecto un DataFrame)
+    global _used_bytes
+
+    file_path, mtime, size = _file_key(path)
+    key = (file_path, mtime, size, name)
+
+    with _lock:
+        if key in _entries:
+            _entries.move_to_end(key)
+            return _entries[key][0]
+
+    df = build(path)
+    df_bytes = sizeof(df)
+
+    with _lock:
+        # Versiones antiguas del mismo fichero ya no son validas
+        for stale in [k for k in _entries if k[0] == file_path and k[1:3] != (mtime, size)]:
+            _drop(stale)
+
+        if df_bytes > _budget_bytes:
+            logger.warning("Dataset %s exceeds cache budget, not cached", file_path)
+            return df
+
+        if key not in _entries:
+            _entries[key] = (df, df_bytes)
+            _used_bytes += df_bytes
+        _entries.move_to_end(key)
+        _evict(_budget_bytes)
+
+        return _entries[key][0] if key in _entries else df
+
+
+def get_dataset(path, columns=None):
+    name = tuple(columns) if columns is not None else None
+    return get_derived(path, name, lambda p: read_dataset(p, columns=columns))
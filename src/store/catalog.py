@@ -0,0 +1,165 @@
+import json
+import threading
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from store.robomap_query import COLUMNS, count_signals, query_bounds, query_dimensions
+
+CATALOG_FILENAME = "catalog.json"
+DATABASE_SUFFIX = ".sqlite3"
+
+# Columnas de filtro, posicion y tiempo en los dos esquemas (robomap y fingerprinting)
+DIMENSION_COLUMNS = ["Mac", "Channel", "Protocol", "beacon", "channel", "protocol"]
+BOUND_COLUMNS = ["Position_x", "Position_y", "x", "y"]
+TIME_COLUMNS = ["Date_hour", "timestamp"]
+
+# Catalogo en memoria por directorio, invalidado por la fecha de modificacion del JSON
+_catalogs = {}
+_lock = threading.Lock()
+
+
+def catalog_path(data_dir):
+    return Path(data_dir) / CATALOG_FILENAME
+
+
+def load_catalog(data_dir):
+    path = catalog_path(data_dir)
+    if not path.exists():
+        return None
+
+    mtime_ns = path.stat().st_mtime_ns
+    with _lock:
+        cached = _catalogs.get(path)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+
+    catalog = _read_catalog(path)
+    with _lock:
+        _catalogs[path] = (mtime_ns, catalog)
+    return catalog
+
+
+def _read_catalog(path):
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_catalog(data_dir, catalog):
+    path = catalog_path(data_dir)
+    tmp_path = path.with_name(path.name + ".tmp")
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(catalog, f, indent=2, sort_keys=True)
+    tmp_path.replace(path)
+
+
+def _read_table(path):
+    if path.suffix == ".csv":
+        return pa.Table.from_pandas(pd.read_csv(path), preserve_index=False)
+
+    with pa.memory_map(str(path)) as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def _describe_table(table):
+    dimensions, bounds, time_range = {}, {}, None
+
+    for column in DIMENSION_COLUMNS:
+        if column in table.column_names:
+            values = pc.drop_null(pc.unique(table[column].combine_chunks()))
+            dimensions[column] = sorted(values.to_pylist())
+
+    for column in BOUND_COLUMNS:
+        if column in table.column_names:
+            extent = pc.min_max(table[column])
+            bounds[column] = [extent["min"].as_py(), extent["max"].as_py()]
+
+    for column in TIME_COLUMNS:
+        if column in table.column_names:
+            extent = pc.min_max(table[column])
+            time_range = [str(extent["min"].as_py()), str(extent["max"].as_py())]
+            break
+
+    return {
+        "rows": table.num_rows,
+        "columns": table.column_names,
+        "dtypes": {field.name: str(field.type) for field in table.schema},
+        "dimensions": dimensions,
+        "bounds": bounds,
+        "time_range": time_range,
+    }
+
+
+def _describe_database(path):
+    dimensions = query_dimensions(path)
+    first, last = dimensions.pop("Date_hour")
+
+    return {
+        "rows": count_signals(path),
+        "columns": list(COLUMNS),
+        "dtypes": {},
+        "dimensions": dimensions,
+        "bounds": query_bounds(path),
+        "time_range": [first, last] if first is not None else None,
+    }
+
+
+def describe_dataset(path):
+    # Se lee el fichero una sola vez, al ingerirlo; las paginas solo leen el catalogo
+    path = Path(path)
+    if path.suffix == DATABASE_SUFFIX:
+        entry = _describe_database(path)
+    else:
+        entry = _describe_table(_read_table(path))
+
+    stat = path.stat()
+    entry.update({"name": path.name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns})
+    return entry
+
+
+def catalog_dataset(path):
+    path = Path(path)
+    entry = describe_dataset(path)
+
+    with _lock:
+        catalog = _read_catalog(catalog_path(path.parent))
+        catalog[path.name] = entry
+        save_catalog(path.parent, catalog)
+
+    return entry
+
+
+def rebuild_catalog(data_dir, paths):
+    catalog = {Path(p).name: describe_dataset(p) for p in paths}
+    save_catalog(data_dir, catalog)
+    return catalog
+
+
+def refresh_catalog(data_dir, catalog):
+    # Un stat por entrada: se quitan los ficheros borrados y se re-describen los modificados
+    data_dir = Path(data_dir)
+    refreshed = {}
+    for name, entry in catalog.items():
+        path = data_dir / name
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        if (stat.st_size, stat.st_mtime_ns) != (entry.get("size"), entry.get("mtime_ns")):
+            entry = describe_dataset(path)
+        refreshed[name] = entry
+
+    if refreshed != catalog:
+        save_catalog(data_dir, refreshed)
+    return refreshed
+
+
+def dataset_entry(path):
+    path = Path(path)
+    catalog = load_catalog(path.parent) or {}
+    return catalog.get(path.name)
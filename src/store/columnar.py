@@ -0,0 +1,58 @@
+
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+STORE_SUFFIX = ".arrow"
+
+# Columnas de baja cardinalidad -> category
+CATEGORY_COLUMNS = ["Mac", "Protocol", "beacon", "protocol"]
+
+# Columnas enteras -> tipo compacto (nullable si hay huecos)
+INTEGER_COLUMNS = {
+    "Channel": "int8",
+    "RSSI": "int16",
+    "channel": "int8",
+    "rssi": "int16",
+}
+
+
+# Logger configurado en app.py (consola y logs/ips_dashboard.log)
+logger = logging.getLogger("ips_dashboard")
+
+
+def _integer_dtype(column, values, dtype):
+    # Valores no enteros o fuera de rango (p.ej. RSSI -60.5): se mantienen en float64
+    present = values.dropna()
+    limits = np.iinfo(dtype)
+    if not ((present % 1 == 0).all() and present.between(limits.min, limits.max).all()):
+        logger.warning("Column %s has values that are not %s integers, kept as float64", column, dtype)
+        return "float64"
+    return dtype.capitalize() if len(present) < len(values) else dtype
+
+
+def coerce_dtypes(df):
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+
+    for column, dtype in INTEGER_COLUMNS.items():
+        if column in df.columns:
+            values = pd.to_numeric(df[column], errors="coerce")
+            df[column] = values.astype(_integer_dtype(column, values, dtype))
+
+    return df
+
+
+def read_dataset(path, columns=None):
+    path = Path(path)
+
+    if path.suffix == ".csv":
+        return pd.read_csv(path, usecols=columns)
+
+    table = feather.read_table(path, columns=columns, memory_map=True)
+    return table.to_pandas()
+
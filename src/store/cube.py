@@ -0,0 +1,243 @@
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from store.cache import get_derived
+from store.columnar import read_dataset
+
+CUBE_SUFFIX = ".cube"
+HISTOGRAM_SUFFIX = ".hist"
+RECEPTION_SUFFIX = ".recv"
+
+DIMENSIONS = ["Mac", "Channel", "Protocol"]
+POSITION = ["Position_x", "Position_y"]
+PERCENTILES = [0.1, 0.25, 0.5, 0.75, 0.9]
+# La perdida de paquetes se mide por Mac: el canal cambia entre lecturas de una captura
+LOSS_KEYS = ["Mac", "Protocol"] + POSITION
+
+STATISTICS = ["count", "mean", "min", "max", "std"] + [f"p{int(q * 100)}" for q in PERCENTILES] + ["loss"]
+
+
+def cube_path(dataset_path):
+    return Path(dataset_path).with_suffix(CUBE_SUFFIX)
+
+
+def histogram_path(dataset_path):
+    return Path(dataset_path).with_suffix(HISTOGRAM_SUFFIX)
+
+
+def reception_path(dataset_path):
+    return Path(dataset_path).with_suffix(RECEPTION_SUFFIX)
+
+
+def build_cube(df):
+    keys = DIMENSIONS + POSITION
+
+    data = df[keys + ["RSSI"]].dropna(subset=keys)
+    data = data.assign(RSSI=pd.to_numeric(data["RSSI"], errors="coerce").astype("float64"))
+
+    grouped = data.groupby(keys, observed=True, sort=True)["RSSI"]
+    cube = grouped.agg(["count", "mean", "min", "max", "std"])
+
+    quantiles = grouped.quantile(PERCENTILES).unstack()
+    quantiles.columns = [f"p{int(q * 100)}" for q in quantiles.columns]
+
+    cube = cube.join(quantiles).reset_index()
+    return add_loss(cube, reception_counts(df))
+
+
+def empty_histogram():
+    names = DIMENSIONS + POSITION + ["RSSI"]
+    index = pd.MultiIndex.from_arrays([[]] * len(names), names=names)
+    return pd.Series([], index=index, dtype="int64")
+
+
+def rssi_histogram(df):
+    keys = DIMENSIONS + POSITION
+
+    data = df[keys + ["RSSI"]].dropna()
+    data = data.assign(RSSI=pd.to_numeric(data["RSSI"], errors="coerce").astype("float64"))
+
+    return data.groupby(keys + ["RSSI"], observed=True).size()
+
+
+def reception_counts(df):
+    # Lecturas esperadas y recibidas por (Mac, Protocol, posicion): en cada captura
+    # se espera la secuencia N_reading completa y cada hueco es un paquete perdido
+    columns = LOSS_KEYS + ["Id_capture", "N_reading"]
+    if not set(columns).issubset(df.columns):
+        return None
+
+    data = df[columns + ["RSSI"]].dropna(subset=columns)
+    per_capture = data.groupby(LOSS_KEYS + ["Id_capture"], observed=True).agg(
+        first=("N_reading", "min"),
+        last=("N_reading", "max"),
+        received=("RSSI", "count"),
+    )
+    per_capture["expected"] = per_capture["last"] - per_capture["first"] + 1
+
+    return per_capture.groupby(LOSS_KEYS, observed=True)[["expected", "received"]].sum().astype("int64")
+
+
+def merge_histograms(left, right):
+    # Sirve para cualquier conteo mezclable (histogramas y recepcion)
+    if left is None:
+        return right
+    if right is None:
+        return left
+    return left.add(right, fill_value=0).astype("int64")
+
+
+def add_loss(cube, reception):
+    if reception is None:
+        return cube.assign(loss=np.nan)
+
+    loss = (1 - reception["received"] / reception["expected"]).clip(0, 1).rename("loss")
+    return cube.join(loss, on=LOSS_KEYS)
+
+
+def build_cube_from_histogram(histogram, reception=None):
+    # Histograma (grupo, RSSI) -> numero de lecturas, mezclable entre chunks
+    keys = DIMENSIONS + POSITION
+
+    # Sin lecturas completas (Mac, canal, protocolo, posicion, RSSI): cubo vacio
+    if histogram.empty:
+        return pd.DataFrame(columns=DIMENSIONS + POSITION + STATISTICS)
+
+    rows = histogram.sort_index().reset_index(name="n")
+    values = rows["RSSI"].to_numpy(dtype="float64")
+    counts = rows["n"].to_numpy(dtype="int64")
+
+    grouped = rows.assign(
+        sum=values * counts,
+        sumsq=values * values * counts,
+    ).groupby(keys, observed=True, sort=True)
+
+    cube = grouped.agg(
+        count=("n", "sum"),
+        sum=("sum", "sum"),
+        sumsq=("sumsq", "sum"),
+        min=("RSSI", "min"),
+        max=("RSSI", "max"),
+    )
+    n = cube["count"].to_numpy(dtype="float64")
+    cube["mean"] = cube["sum"] / n
+    with np.errstate(invalid="ignore", divide="ignore"):
+        variance = (cube["sumsq"] - n * cube["mean"] ** 2) / (n - 1)
+    cube["std"] = np.sqrt(np.clip(variance, 0, None)).where(n > 1)
+
+    # Percentiles exactos (interpolacion lineal) sobre el histograma acumulado
+    cumulative = np.cumsum(counts)
+    group_ids = grouped.ngroup().to_numpy()
+    starts = np.flatnonzero(np.r_[True, group_ids[1:] != group_ids[:-1]])
+    offsets = cumulative[starts] - counts[starts]
+    for q in PERCENTILES:
+        h = (n - 1) * q
+        lower = np.floor(h)
+        upper = np.minimum(lower + 1, n - 1)
+        v_lower = values[np.searchsorted(cumulative, offsets + lower, side="right")]
+        v_upper = values[np.searchsorted(cumulative, offsets + upper, side="right")]
+        cube[f"p{int(q * 100)}"] = v_lower + (h - lower) * (v_upper - v_lower)
+
+    cube = add_loss(cube.reset_index(), reception)
+    return cube[DIMENSIONS + POSITION + STATISTICS]
+
+
+def read_histogram(dataset_path):
+    path = histogram_path(dataset_path)
+    if not path.exists():
+        return None
+
+    table = feather.read_table(path)
+    return table.to_pandas().set_index(DIMENSIONS + POSITION + ["RSSI"])["n"]
+
+
+def read_reception(dataset_path):
+    path = reception_path(dataset_path)
+    if not path.exists():
+        return None
+
+    table = feather.read_table(path)
+    return table.to_pandas().set_index(LOSS_KEYS)
+
+
+def write_cube(df, dataset_path, histogram=None, reception=None):
+    output_path = cube_path(dataset_path)
+
+    if histogram is None:
+        cube = build_cube(df)
+    else:
+        # Se guardan tambien los conteos para poder actualizar el cubo de forma incremental
+        feather.write_feather(
+            pa.Table.from_pandas(histogram.rename("n").reset_index(), preserve_index=False),
+            histogram_path(dataset_path),
+            compression="uncompressed",
+        )
+        if reception is not None:
+            feather.write_feather(
+                pa.Table.from_pandas(reception.reset_index(), preserve_index=False),
+                reception_path(dataset_path),
+                compression="uncompressed",
+            )
+        cube = build_cube_from_histogram(histogram, reception)
+    table = pa.Table.from_pandas(cube, preserve_index=False)
+    feather.write_feather(table, output_path, compression="uncompressed")
+
+    return output_path
+
+
+def index_cube(cube):
+    cube = cube.set_index(DIMENSIONS + POSITION).sort_index()
+    cube.index = cube.index.remove_unused_levels()
+    return cube
+
+
+def load_cube(dataset_path):
+    sidecar = cube_path(dataset_path)
+
+    if sidecar.exists():
+        return get_derived(sidecar, "cube", lambda p: index_cube(read_dataset(p)))
+
+    # Datasets sin cubo persistido (p.ej. CSV antiguos): se construye una vez
+    columns = DIMENSIONS + POSITION + ["RSSI"]
+    return get_derived(
+        dataset_path, "cube",
+        lambda p: index_cube(build_cube(read_dataset(p, columns=columns))),
+    )
+
+
+def cube_dimensions(cube):
+    return {
+        name: sorted(level.tolist())
+        for name, level in zip(cube.index.names, cube.index.levels)
+        if name in DIMENSIONS
+    }
+
+
+def cube_matrix(cube, macs, channel, protocol, statistic="mean"):
+    # Un estadistico por (posicion, Mac) para varios beacons a la vez:
+    # filas = posiciones con alguna medida, columnas = macs (NaN si no se midio)
+    try:
+        selection = cube.xs((channel, protocol), level=["Channel", "Protocol"])[statistic]
+    except KeyError:
+        return np.empty((0, 2)), np.empty((0, len(macs)))
+
+    table = selection.unstack("Mac")
+    table = table.reindex(columns=pd.Index(macs, dtype=table.columns.dtype))
+    table = table[table.notna().any(axis=1)]
+
+    positions = table.index.to_frame(index=False)[POSITION].to_numpy(dtype="float64")
+    return positions, table.to_numpy(dtype="float64")
+
+
+def cube_slice(cube, mac, channel, protocol, statistic="mean"):
+    try:
+        selection = cube.loc[(mac, channel, protocol), [statistic]]
+    except KeyError:
+        return pd.DataFrame(columns=POSITION + [statistic])
+
+    return selection.reset_index()
@@ -0,0 +1,155 @@
+
+import importlib.util
+import logging
+import re
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+ENGINE_FILENAME = "datasets.duckdb"
+
+NUMERIC_TYPES = ("TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "UTINYINT", "USMALLINT",
+                 "UINTEGER", "UBIGINT", "FLOAT", "DOUBLE", "DECIMAL")
+
+# Logger configurado en app.py (consola y logs/ips_dashboard.log)
+logger = logging.getLogger("ips_dashboard")
+
+_lock = threading.Lock()
+_connections = {}
+
+
+def available():
+    # Dependencia opcional; se importa al abrir la primera conexion, no al arrancar
+    return importlib.util.find_spec("duckdb") is not None
+
+
+def _connection(engine_path):
+    # Una conexion por fichero de motor y proceso; cada consulta usa su propio cursor
+    key = str(Path(engine_path).resolve())
+    with _lock:
+        if key not in _connections:
+            import duckdb
+
+            # Lo que no quepa en memoria se vuelca a disco junto al motor; las rutas
+            # nunca se escriben dentro del SQL (config y parametros)
+            conn = duckdb.connect(key, config={"temp_directory": str(Path(key).parent / ".duckdb_tmp")})
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS _datasets ("
+                "table_name VARCHAR PRIMARY KEY, source VARCHAR, mtime_ns BIGINT, size BIGINT)"
+            )
+            _connections[key] = conn
+        return _connections[key].cursor()
+
+
+def _table_name(path):
+    return "ds_" + re.sub(r"\W", "_", Path(path).name)
+
+
+def register_dataset(engine_path, path):
+    # Copia el dataset a una tabla en disco del motor (solo si cambio el fichero)
+    path = Path(path)
+    table = _table_name(path)
+    stat = path.stat()
+
+    cursor = _connection(engine_path)
+    row = cursor.execute(
+        "SELECT mtime_ns, size FROM _datasets WHERE table_name = ?", [table]
+    ).fetchone()
+    if row == (stat.st_mtime_ns, stat.st_size):
+        return table
+
+    params = []
+    if path.suffix == ".csv":
+        source = "read_csv_auto(?)"
+        params = [path.as_posix()]
+    else:
+        # Lectura por lotes del fichero Arrow, sin cargarlo entero en memoria
+        import pyarrow.dataset as pa_dataset
+
+        cursor.register("arrow_source", pa_dataset.dataset(path, format="ipc"))
+        source = "arrow_source"
+
+    with _lock:
+        cursor.execute(f'CREATE OR REPLACE TABLE "{table}" AS SELECT * FROM {source}', params)
+        if source == "arrow_source":
+            cursor.unregister("arrow_source")
+        cursor.execute(
+            "INSERT OR REPLACE INTO _datasets VALUES (?, ?, ?, ?)",
+            [table, str(path), stat.st_mtime_ns, stat.st_size],
+        )
+    logger.info("Dataset %s registered in engine table %s", path, table)
+
+    return table
+
+
+def summary(engine_path, path):
+    # Equivalente a DataFrame.describe() calculado dentro del motor
+    table = register_dataset(engine_path, path)
+    stats = _connection(engine_path).execute(f'SUMMARIZE "{table}"').df()
+    stats = stats[stats["column_type"].str.startswith(NUMERIC_TYPES)]
+
+    non_null = stats["count"] * (1 - stats["null_percentage"].astype(float) / 100)
+    described = pd.DataFrame({
+        "count": non_null.round(),
+        "mean": stats["avg"],
+        "std": stats["std"],
+        "min": stats["min"],
+        "25%": stats["q25"],
+        "50%": stats["q50"],
+        "75%": stats["q75"],
+        "max": stats["max"],
+    }).astype(float)
+    described.index = stats["column_name"]
+    described.index.name = None
+
+    return described.T
+
+
+def _filter(mac, channel, protocol):
+    return 'WHERE "Mac" = ? AND "Channel" = ? AND "Protocol" = ?', [mac, channel, protocol]
+
+
+def position_means(engine_path, path, mac, channel, protocol):
+    table = register_dataset(engine_path, path)
+    where, params = _filter(mac, channel, protocol)
+    return _connection(engine_path).execute(
+        f'SELECT "Position_x", "Position_y", avg("RSSI") AS "RSSI", count(*) AS "count" '
+        f'FROM "{table}" {where} GROUP BY ALL ORDER BY 1, 2',
+        params,
+    ).df()
+
+
+def filtered_rows(engine_path, path, mac, channel, protocol, columns):
+    table = register_dataset(engine_path, path)
+    where, params = _filter(mac, channel, protocol)
+    projection = ", ".join(f'"{c}"' for c in columns)
+    return _connection(engine_path).execute(
+        f'SELECT {projection} FROM "{table}" {where}', params,
+    ).df()
+
+
+def columns(engine_path, path):
+    table = register_dataset(engine_path, path)
+    return [row[0] for row in _connection(engine_path).execute(f'DESCRIBE "{table}"').fetchall()]
+
+
+def page(engine_path, path, offset=0, limit=100, sort_by=None, ascending=True,
+         filter_column=None, filter_value=None):
+    table = register_dataset(engine_path, path)
+    cursor = _connection(engine_path)
+
+    where, params = "", []
+    if filter_column is not None and filter_value:
+        where = f'WHERE CAST("{filter_column}" AS VARCHAR) LIKE ?'
+        params.append(f"%{filter_value}%")
+
+    order = f'ORDER BY "{sort_by}" {"ASC" if ascending else "DESC"}' if sort_by is not None else ""
+
+    total = cursor.execute(f'SELECT count(*) FROM "{table}" {where}', params).fetchone()[0]
+    df = cursor.execute(
+        f'SELECT * FROM "{table}" {where} {order} LIMIT ? OFFSET ?', params + [limit, offset],
+    ).df()
+
+    df.index = pd.RangeIndex(offset, offset + len(df))
+    return df, total
@@ -0,0 +1,171 @@
+
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from store.columnar import CATEGORY_COLUMNS, INTEGER_COLUMNS, STORE_SUFFIX
+from store.cube import merge_histograms, reception_counts, rssi_histogram, write_cube
+
+# Columnas minimas para el dashboard (export de robomap) y columnas del ETL de fingerprinting
+ROBOMAP_COLUMNS = ["Mac", "Channel", "Protocol", "RSSI", "Position_x", "Position_y"]
+FINGERPRINT_COLUMNS = ["timestamp", "x", "y", "beacon", "protocol", "channel", "rssi"]
+
+DEFAULT_CHUNKSIZE = 200_000
+
+# Tipos fijados al leer: el esquema del fichero no puede depender de lo que
+# pandas infiera en el primer chunk (p.ej. Position_x = 1 y luego 1.5)
+FLOAT_COLUMNS = [
+    "Light", "Temperature", "Relative_humidity", "Absolute_humidity",
+    "Position_x", "Position_y", "Position_z", "Platform_angle", "Dongle_rotation",
+    "x", "y",
+]
+ID_COLUMNS = ["Beacon_Id", "Id_capture", "N_reading", "Pack_size"]
+TEXT_COLUMNS = ["Date_hour", "Date", "PDU_type", "CRC", "Identificator", "timestamp"]
+CSV_DTYPES = {
+    **{column: "float64" for column in FLOAT_COLUMNS},
+    **{column: "Int64" for column in ID_COLUMNS},
+    **{column: "str" for column in TEXT_COLUMNS + CATEGORY_COLUMNS},
+}
+
+
+DICTIONARY_INDEX = pa.int32()
+
+
+class SchemaError(ValueError):
+    # Fichero con columnas o tipos no validos (error del usuario, no de Arrow)
+    pass
+
+
+def validate_schema(columns):
+    columns = set(columns)
+    if columns.issuperset(ROBOMAP_COLUMNS):
+        return "robomap"
+    if columns.issuperset(FINGERPRINT_COLUMNS):
+        return "fingerprint"
+
+    missing = [c for c in ROBOMAP_COLUMNS if c not in columns]
+    raise SchemaError(
+        f"Unrecognised schema, missing robomap columns {missing} "
+        f"(or fingerprint columns {FINGERPRINT_COLUMNS})"
+    )
+
+
+def _coerce_chunk(chunk, categories):
+    # Categorias acumuladas entre chunks: cada diccionario nuevo extiende al
+    # anterior, que es lo que admite el formato de fichero Arrow (deltas)
+    for column in CATEGORY_COLUMNS:
+        if column in chunk.columns:
+            known = categories.setdefault(column, [])
+            seen = set(known)
+            known.extend(v for v in pd.unique(chunk[column].dropna()) if v not in seen)
+            chunk[column] = pd.Categorical(chunk[column], categories=list(known))
+
+    # Siempre nullable: el tipo no puede depender de si un chunk trae huecos
+    for column, dtype in INTEGER_COLUMNS.items():
+        if column in chunk.columns:
+            try:
+                chunk[column] = pd.to_numeric(chunk[column], errors="coerce").astype(dtype.capitalize())
+            except (TypeError, ValueError):
+                raise SchemaError(f"Column '{column}' must hold {dtype} integers") from None
+
+    # Resto de columnas numericas: float64 para que un decimal posterior no cambie el tipo
+    for column in chunk.columns:
+        if column not in CSV_DTYPES and column not in INTEGER_COLUMNS:
+            if pd.api.types.is_numeric_dtype(chunk[column]) and not pd.api.types.is_bool_dtype(chunk[column]):
+                chunk[column] = chunk[column].astype("float64")
+
+    return chunk
+
+
+def _file_type(field, table):
+    # Indices de diccionario fijos: pandas los ensancha (int8 -> int16) al crecer las categorias
+    if pa.types.is_dictionary(field.type):
+        return pa.dictionary(DICTIONARY_INDEX, field.type.value_type)
+    # Columnas sin ningun valor en el primer chunk: se guardan como texto
+    if field.name not in CSV_DTYPES and table[field.name].null_count == len(table):
+        return pa.string()
+    return field.type
+
+
+def _file_schema(table):
+    return pa.schema([field.with_type(_file_type(field, table)) for field in table.schema])
+
+
+def _cast_chunk(table, schema, rows):
+    # Solo las columnas no fijadas pueden cambiar de tipo (p.ej. texto en una columna numerica)
+    for field in schema:
+        column = table.schema.field(field.name)
+        if column.type != field.type:
+            try:
+                table = table.set_column(
+                    table.schema.get_field_index(field.name), field, table[field.name].cast(field.type),
+                )
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                raise SchemaError(
+                    f"Column '{field.name}' changes type from {field.type} to {column.type} "
+                    f"after row {rows:,}"
+                ) from None
+    return table
+
+
+def ingest_csv(source, output_path, chunksize=DEFAULT_CHUNKSIZE, progress=None):
+    # CSV -> Arrow por chunks: memoria acotada por chunksize, valida el esquema con
+    # el primer chunk y publica el fichero con un rename atomico al terminar
+    output_path = Path(output_path).with_suffix(STORE_SUFFIX)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+
+    total_size = getattr(source, "size", None)
+    categories = {}
+    histogram = None
+    reception = None
+    kind = None
+    rows = 0
+    writer = None
+    sink = None
+
+    try:
+        for chunk in pd.read_csv(source, chunksize=chunksize, dtype=CSV_DTYPES):
+            if kind is None:
+                kind = validate_schema(chunk.columns)
+
+            chunk = _coerce_chunk(chunk, categories)
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+
+            if writer is None:
+                schema = _file_schema(table)
+                sink = pa.OSFile(str(tmp_path), "wb")
+                writer = pa.ipc.new_file(
+                    sink, schema, options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True),
+                )
+            writer.write_table(_cast_chunk(table, schema, rows))
+
+            if kind == "robomap":
+                histogram = merge_histograms(histogram, rssi_histogram(chunk))
+                reception = merge_histograms(reception, reception_counts(chunk))
+            rows += len(chunk)
+
+            if progress is not None and total_size:
+                progress(min(source.tell() / total_size, 1.0), rows)
+
+        if writer is None:
+            raise SchemaError("The file is empty")
+
+        writer.close()
+        sink.close()
+        writer = None
+        tmp_path.replace(output_path)
+    except pd.errors.EmptyDataError:
+        raise SchemaError("The file is empty") from None
+    finally:
+        if writer is not None:
+            writer.close()
+            sink.close()
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+    cube_file = None
+    if histogram is not None:
+        cube_file = write_cube(None, output_path, histogram=histogram, reception=reception)
+
+    return output_path, cube_file, rows, kind
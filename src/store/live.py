@@ -0,0 +1,110 @@
+
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from etl.etl_robomap_db import SELECT_QUERY, transform_data
+from store.columnar import coerce_dtypes
+from store.cube import build_cube_from_histogram, index_cube, merge_histograms, reception_counts, rssi_histogram
+
+# Columnas que se mantienen en memoria de cada lectura en vivo
+LIVE_COLUMNS = ["Beacon_Id", "Date_hour", "Mac", "Channel", "Protocol", "RSSI", "Position_x", "Position_y"]
+
+# Logger configurado en app.py (consola y logs/ips_dashboard.log)
+logger = logging.getLogger("ips_dashboard")
+
+_lock = threading.Lock()
+_sources = {}
+
+
+def get_live_source(db_path):
+    # Una fuente por base de datos, compartida por todas las sesiones
+    key = str(Path(db_path).resolve())
+    with _lock:
+        if key not in _sources:
+            _sources[key] = {
+                "path": key,
+                "lock": threading.Lock(),
+                "conn": None,
+                "data_version": None,
+                "high_water_mark": 0,
+                "chunks": [],
+                "rows": 0,
+                "histogram": None,
+                "reception": None,
+                "cube": None,
+            }
+        return _sources[key]
+
+
+def close_live_source(db_path):
+    key = str(Path(db_path).resolve())
+    with _lock:
+        source = _sources.pop(key, None)
+    if source is not None and source["conn"] is not None:
+        source["conn"].close()
+
+
+def _connection(source):
+    if source["conn"] is None:
+        uri = Path(source["path"]).as_uri() + "?mode=ro"
+        source["conn"] = sqlite3.connect(uri, uri=True, timeout=5, check_same_thread=False)
+    return source["conn"]
+
+
+def poll_live_source(source, max_rows=None):
+    # Lee solo las filas con Id > high_water_mark; devuelve cuantas se han anadido
+    with source["lock"]:
+        conn = _connection(source)
+
+        # data_version cambia cuando otra conexion confirma una escritura
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == source["data_version"]:
+            return 0
+
+        query = SELECT_QUERY + " WHERE b.Id > ? ORDER BY b.Id"
+        params = [source["high_water_mark"]]
+        if max_rows is not None:
+            query += " LIMIT ?"
+            params.append(max_rows)
+
+        try:
+            delta = pd.read_sql(query + ";", conn, params=params)
+        except (sqlite3.OperationalError, pd.errors.DatabaseError) as e:
+            # Tablas aun sin crear o base de datos bloqueada por el logger;
+            # pandas envuelve el error de sqlite3 en DatabaseError
+            logger.warning("Live source %s not readable yet: %s", source["path"], e.__cause__ or e)
+            return 0
+
+        # Con LIMIT puede quedar delta pendiente: no se marca la version como vista
+        if max_rows is None or len(delta) < max_rows:
+            source["data_version"] = data_version
+
+        if delta.empty:
+            return 0
+
+        delta = transform_data(delta)
+        source["reception"] = merge_histograms(source["reception"], reception_counts(delta))
+        delta = delta[LIVE_COLUMNS]
+        source["chunks"].append(delta)
+        source["rows"] += len(delta)
+        source["high_water_mark"] = int(delta["Beacon_Id"].max())
+
+        # Agregados por posicion actualizados con el delta, sin releer lo anterior
+        source["histogram"] = merge_histograms(source["histogram"], rssi_histogram(delta))
+        source["cube"] = index_cube(build_cube_from_histogram(source["histogram"], source["reception"]))
+
+        return len(delta)
+
+
+def live_frame(source):
+    with source["lock"]:
+        if not source["chunks"]:
+            return pd.DataFrame(columns=LIVE_COLUMNS)
+        if len(source["chunks"]) > 1 or source["chunks"][0]["Mac"].dtype != "category":
+            # Se compactan los chunks pendientes en un solo frame con tipos compactos
+            source["chunks"] = [coerce_dtypes(pd.concat(source["chunks"], ignore_index=True))]
+        return source["chunks"][0]
@@ -0,0 +1,71 @@
+
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+
+from store.cache import get_dataset, get_derived
+
+
+def _open_table(path):
+    # Fichero Arrow sin comprimir + memory-map: abrirlo no copia datos
+    return feather.read_table(path, memory_map=True)
+
+
+def _row_indices(path, sort_by, ascending, filter_column, filter_value):
+    # Indices de las filas que cumplen el filtro, en el orden pedido. Se cachean
+    # para que cambiar de pagina no vuelva a filtrar ni ordenar.
+    if sort_by is None and not (filter_column is not None and filter_value):
+        return None
+
+    def build(p):
+        table = _open_table(p)
+        indices = None
+
+        if filter_column is not None and filter_value:
+            column = pc.cast(table[filter_column], pa.string())
+            mask = pc.fill_null(pc.match_substring(column, filter_value), False)
+            indices = pc.indices_nonzero(mask)
+
+        if sort_by is not None:
+            column = table[sort_by] if indices is None else table[sort_by].take(indices)
+            if pa.types.is_dictionary(column.type):
+                column = pc.cast(column, column.type.value_type)
+            order = pc.array_sort_indices(column, order="ascending" if ascending else "descending")
+            indices = order if indices is None else indices.take(order)
+
+        return pd.DataFrame({"row": [] if indices is None else indices.to_numpy()})
+
+    name = ("rows", sort_by, ascending, filter_column, filter_value)
+    return get_derived(path, name, build)["row"].to_numpy()
+
+
+def read_rows(path, offset=0, limit=100, sort_by=None, ascending=True,
+              filter_column=None, filter_value=None):
+    # Ventana [offset, offset + limit) del dataset tras filtrar y ordenar.
+    # Devuelve (filas, numero total de filas que cumplen el filtro).
+    path = Path(path)
+
+    if path.suffix == ".csv":
+        df = get_dataset(path)
+        if filter_column is not None and filter_value:
+            df = df[df[filter_column].astype(str).str.contains(filter_value, regex=False, na=False)]
+        if sort_by is not None:
+            df = df.sort_values(sort_by, ascending=ascending)
+        return df.iloc[offset:offset + limit], len(df)
+
+    table = _open_table(path)
+    indices = _row_indices(path, sort_by, ascending, filter_column, filter_value)
+
+    if indices is None:
+        total = table.num_rows
+        window = table.slice(offset, limit)
+    else:
+        total = len(indices)
+        window = table.take(indices[offset:offset + limit])
+
+    df = window.to_pandas()
+    df.index = pd.RangeIndex(offset, offset + len(df))
+    return df, total
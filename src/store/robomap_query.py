@@ -0,0 +1,243 @@
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+# Columna de salida -> expresion SQL sobre Beacon_BLE_Signal b JOIN Capture c
+COLUMNS = {
+    "Beacon_Id": "b.Id",
+    "Id_capture": "b.Id_capture",
+    "N_reading": "b.N_reading",
+    "Date_hour": "b.Date_hour",
+    "Mac": "b.Mac",
+    "Pack_size": "b.Pack_size",
+    "Channel": "b.Channel",
+    "RSSI": "b.RSSI",
+    "PDU_type": "b.PDU_type",
+    "CRC": "b.CRC",
+    "Protocol": "b.Protocol",
+    "Identificator": "b.Identificator",
+    "Date": "c.Date",
+    "Light": "c.Light",
+    "Temperature": "c.Temperature",
+    "Relative_humidity": "c.Relative_humidity",
+    "Absolute_humidity": "c.Absolute_humidity",
+    "Position_x": "c.Position_x",
+    "Position_y": "c.Position_y",
+    "Position_z": "c.Position_z",
+    "Platform_angle": "c.Platform_angle",
+    "Dongle_rotation": "c.Dongle_rotation",
+}
+
+INDEX_NAME = "idx_beacon_mac_channel_protocol_capture"
+INDEX_COLUMNS = ["Mac", "Channel", "Protocol", "Id_capture"]
+SIDECAR_SUFFIX = ".idx"
+POOL_SIZE = 4
+
+_lock = threading.Lock()
+_pools = {}
+
+
+def _has_index(conn):
+    for index in conn.execute("PRAGMA index_list(Beacon_BLE_Signal)").fetchall():
+        columns = [row[2] for row in conn.execute(f"PRAGMA index_info('{index[1]}')").fetchall()]
+        if columns[:len(INDEX_COLUMNS)] == INDEX_COLUMNS:
+            return True
+    return False
+
+
+def indexed_database(db_path, logger=None):
+    # Base de datos a consultar: la original si ya tiene el indice, si no una
+    # copia al lado (<db>.idx) con el indice creado. La original no se modifica.
+    db_path = Path(db_path)
+
+    conn = sqlite3.connect(db_path.resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        if _has_index(conn):
+            return db_path
+    finally:
+        conn.close()
+
+    sidecar = db_path.with_name(db_path.name + SIDECAR_SUFFIX)
+    if sidecar.exists() and sidecar.stat().st_mtime_ns >= db_path.stat().st_mtime_ns:
+        return sidecar
+
+    with _lock:
+        pool = _pools.pop(str(sidecar.resolve()), None)
+    if pool is not None:
+        while not pool.empty():
+            pool.get_nowait().close()
+
+    tmp_path = sidecar.with_name(sidecar.name + ".tmp")
+    source = sqlite3.connect(db_path)
+    target = sqlite3.connect(tmp_path)
+    try:
+        source.backup(target)
+        target.execute(
+            f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} "
+            f"ON Beacon_BLE_Signal ({', '.join(INDEX_COLUMNS)})"
+        )
+        target.execute("ANALYZE")
+        target.commit()
+    finally:
+        source.close()
+        target.close()
+    tmp_path.replace(sidecar)
+
+    if logger is not None:
+        logger.info("Indexed copy of %s written to %s", db_path, sidecar)
+
+    return sidecar
+
+
+@contextmanager
+def connection(db_path):
+    # Conexiones de solo lectura reutilizadas entre consultas y sesiones
+    key = str(Path(db_path).resolve())
+    with _lock:
+        pool = _pools.setdefault(key, queue.Queue(maxsize=POOL_SIZE))
+
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        conn = sqlite3.connect(Path(key).as_uri() + "?mode=ro", uri=True, check_same_thread=False)
+
+    try:
+        yield conn
+    finally:
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+def _where(mac=None, channel=None, protocol=None, start=None, end=None):
+    clauses, params = [], []
+
+    for column, value in (("b.Mac", mac), ("b.Channel", channel), ("b.Protocol", protocol)):
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            values = list(value)
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        else:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+
+    # Date_hour se guarda como texto ISO: la comparacion lexicografica es cronologica
+    if start is not None:
+        clauses.append("b.Date_hour >= ?")
+        params.append(str(pd.Timestamp(start)))
+    if end is not None:
+        clauses.append("b.Date_hour < ?")
+        params.append(str(pd.Timestamp(end)))
+
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def _convert(value):
+    return value.item() if hasattr(value, "item") else value
+
+
+def query_signals(db_path, columns=None, mac=None, channel=None, protocol=None,
+                  start=None, end=None, limit=None, offset=None):
+    columns = columns or list(COLUMNS)
+    unknown = [c for c in columns if c not in COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown columns: {unknown}")
+
+    where, params = _where(mac, channel, protocol, start, end)
+    query = (
+        f"SELECT {', '.join(f'{COLUMNS[c]} AS {c}' for c in columns)} "
+        "FROM Beacon_BLE_Signal b JOIN Capture c ON b.Id_capture = c.Id"
+        + where
+    )
+    if limit is not None:
+        query += " LIMIT ? OFFSET ?"
+        params += [limit, offset or 0]
+
+    with connection(db_path) as conn:
+        df = pd.read_sql(query, conn, params=[_convert(p) for p in params])
+
+    if "Date_hour" in df.columns:
+        df["Date_hour"] = pd.to_datetime(df["Date_hour"], errors="coerce")
+
+    return df
+
+
+def query_position_means(db_path, mac=None, channel=None, protocol=None, start=None, end=None):
+    # Agregacion por posicion dentro de SQLite: solo viaja una fila por posicion
+    where, params = _where(mac, channel, protocol, start, end)
+    query = (
+        "SELECT c.Position_x AS Position_x, c.Position_y AS Position_y, "
+        "AVG(b.RSSI) AS RSSI, COUNT(*) AS count "
+        "FROM Beacon_BLE_Signal b JOIN Capture c ON b.Id_capture = c.Id"
+        + where
+        + " GROUP BY c.Position_x, c.Position_y ORDER BY c.Position_x, c.Position_y"
+    )
+
+    with connection(db_path) as conn:
+        return pd.read_sql(query, conn, params=[_convert(p) for p in params])
+
+
+def query_dimensions(db_path):
+    dimensions = {}
+    with connection(db_path) as conn:
+        for column in ["Mac", "Channel", "Protocol"]:
+            rows = conn.execute(
+                f"SELECT DISTINCT {column} FROM Beacon_BLE_Signal "
+                f"WHERE {column} IS NOT NULL ORDER BY {column}"
+            ).fetchall()
+            dimensions[column] = [row[0] for row in rows]
+
+        dimensions["Date_hour"] = conn.execute(
+            "SELECT MIN(Date_hour), MAX(Date_hour) FROM Beacon_BLE_Signal"
+        ).fetchone()
+
+    return dimensions
+
+
+def query_bounds(db_path):
+    with connection(db_path) as conn:
+        row = conn.execute(
+            "SELECT MIN(Position_x), MAX(Position_x), MIN(Position_y), MAX(Position_y) FROM Capture"
+        ).fetchone()
+
+    return {"Position_x": [row[0], row[1]], "Position_y": [row[2], row[3]]}
+
+
+def count_signals(db_path):
+    with connection(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM Beacon_BLE_Signal").fetchone()[0]
+
+
+def query_page(db_path, offset=0, limit=100, sort_by=None, ascending=True,
+               filter_column=None, filter_value=None):
+    # Pagina de lecturas con filtro "contiene" y orden resueltos en SQLite
+    clauses, params = [], []
+    if filter_column is not None and filter_value:
+        if filter_column not in COLUMNS:
+            raise ValueError(f"Unknown column: {filter_column}")
+        clauses.append(f"CAST({COLUMNS[filter_column]} AS TEXT) LIKE ?")
+        params.append(f"%{filter_value}%")
+    where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+
+    source = "FROM Beacon_BLE_Signal b JOIN Capture c ON b.Id_capture = c.Id" + where
+    query = f"SELECT {', '.join(f'{expr} AS {c}' for c, expr in COLUMNS.items())} {source}"
+    if sort_by is not None:
+        if sort_by not in COLUMNS:
+            raise ValueError(f"Unknown column: {sort_by}")
+        query += f" ORDER BY {COLUMNS[sort_by]} {'ASC' if ascending else 'DESC'}"
+    query += " LIMIT ? OFFSET ?"
+
+    with connection(db_path) as conn:
+        total = conn.execute(f"SELECT COUNT(*) {source}", params).fetchone()[0]
+        df = pd.read_sql(query, conn, params=params + [limit, offset])
+
+    df.index = pd.RangeIndex(offset, offset + len(df))
+    return df, total
@@ -0,0 +1,101 @@
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+# Spans por hilo (cada sesion de Streamlit ejecuta su script en su propio hilo).
+# Sin una ejecucion activa span() no registra nada: el coste es un getattr
+_state = threading.local()
+_log_lock = threading.Lock()
+_log_path = None
+
+ENV_VARIABLE = "IPS_METRICS"
+
+
+def enabled_by_env():
+    return os.environ.get(ENV_VARIABLE, "0") not in ("", "0")
+
+
+def set_log_path(path):
+    # Fichero JSON-lines donde se anade un registro por span al terminar cada ejecucion
+    global _log_path
+    _log_path = path
+
+
+def start_run(name):
+    _state.run = {
+        "run_id": uuid.uuid4().hex[:12],
+        "run": name,
+        "started": datetime.now().isoformat(timespec="milliseconds"),
+        "origin": time.perf_counter(),
+        "spans": [],
+        "depth": 0,
+    }
+
+
+def end_run():
+    run = getattr(_state, "run", None)
+    _state.run = None
+    if run is None:
+        return []
+
+    spans = run["spans"]
+    if _log_path is not None and spans:
+        with _log_lock, open(_log_path, "a", encoding="utf-8") as f:
+            for record in spans:
+                f.write(json.dumps(
+                    {"run_id": run["run_id"], "run": run["run"], "started": run["started"], **record},
+                    default=str,
+                ) + "\n")
+
+    return spans
+
+
+@contextmanager
+def span(name, **attributes):
+    run = getattr(_state, "run", None)
+    if run is None:
+        yield
+        return
+
+    record = {"name": name, "depth": run["depth"], **attributes}
+    # Se anade al empezar para que la lista quede en orden de apertura (arbol en preorden)
+    run["spans"].append(record)
+    run["depth"] += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        run["depth"] -= 1
+        record["start_s"] = round(start - run["origin"], 6)
+        record["duration_s"] = round(end - start, 6)
+
+
+def timed(name=None):
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def recording(name):
+    # Ejecucion completa (p.ej. un rerun o un ETL): devuelve la lista de spans al salir
+    start_run(name)
+    spans = []
+    try:
+        yield spans
+    finally:
+        spans.extend(end_run())
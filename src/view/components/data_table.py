@@ -0,0 +1,42 @@
+
+import math
+
+import streamlit as st
+
+PAGE_SIZES = [100, 500, 1000]
+
+
+def paginated_table(fetch_page, columns, key):
+    # fetch_page(offset, limit, sort_by, ascending, filter_column, filter_value) -> (df, total)
+    # Solo se lee y se envia al navegador la pagina visible
+    col_filter, col_value, col_sort, col_order, col_size = st.columns([2, 2, 2, 1, 1])
+    with col_filter:
+        filter_column = st.selectbox(
+            "Filter column", [None] + columns, key=f"{key}_filter_column",
+            format_func=lambda c: "(none)" if c is None else c,
+        )
+    with col_value:
+        filter_value = st.text_input("Contains", key=f"{key}_filter_value", disabled=filter_column is None)
+    with col_sort:
+        sort_by = st.selectbox(
+            "Sort by", [None] + columns, key=f"{key}_sort_by",
+            format_func=lambda c: "(file order)" if c is None else c,
+        )
+    with col_order:
+        ascending = st.toggle("Ascending", value=True, key=f"{key}_ascending")
+    with col_size:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, key=f"{key}_page_size")
+
+    query = dict(sort_by=sort_by, ascending=ascending, filter_column=filter_column, filter_value=filter_value)
+
+    _, total = fetch_page(0, 0, **query)
+    n_pages = max(1, math.ceil(total / page_size))
+
+    page = st.number_input(
+        f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1, key=f"{key}_page",
+    )
+    page = min(page, n_pages)
+
+    df, total = fetch_page((page - 1) * page_size, page_size, **query)
+    st.dataframe(df)
+    st.caption(f"Rows {(page - 1) * page_size + 1 if total else 0}-{(page - 1) * page_size + len(df)} of {total}")
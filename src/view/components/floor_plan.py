@@ -0,0 +1,59 @@
+
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from pathlib import Path
+
+# Ancho maximo de la variante de visualizacion (2x el ancho renderizado por defecto)
+MAX_DISPLAY_WIDTH = 1800
+MAX_CACHED_PLANS = 8
+
+_lock = threading.Lock()
+_plans = OrderedDict()
+
+
+def _read_bytes(image):
+    if hasattr(image, "getvalue"):
+        return image.getvalue()
+    return Path(image).read_bytes()
+
+
+def load_floor_plan(image, max_display_width=MAX_DISPLAY_WIDTH):
+    # Devuelve el tamano original (sistema de coordenadas del heatmap) y el
+    # data URI de una variante reducida, cacheado por hash del contenido
+    content = _read_bytes(image)
+    key = (hashlib.sha1(content).hexdigest(), max_display_width)
+
+    with _lock:
+        if key in _plans:
+            _plans.move_to_end(key)
+            return _plans[key]
+
+    # PIL solo se importa cuando hay plano de fondo
+    from PIL import Image
+
+    img = Image.open(BytesIO(content))
+    width, height = img.size
+
+    if width > max_display_width:
+        display_height = max(1, round(height * max_display_width / width))
+        img = img.resize((max_display_width, display_height), Image.LANCZOS)
+
+    buffer = BytesIO()
+    img.save(buffer, format="PNG", optimize=True)
+
+    plan = {
+        "width": width,
+        "height": height,
+        "data_uri": "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode(),
+    }
+
+    with _lock:
+        _plans[key] = plan
+        _plans.move_to_end(key)
+        while len(_plans) > MAX_CACHED_PLANS:
+            _plans.popitem(last=False)
+
+    return plan
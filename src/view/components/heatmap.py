@@ -1,11 +1,40 @@
 
 import numpy as np
 import plotly.graph_objects as go
-from scipy.ndimage import gaussian_filter
-from scipy.interpolate import griddata
-from PIL import Image
-import base64
-from io import BytesIO
+from plotly.colors import qualitative
+from plotly.io.json import to_json_plotly
+from plotly.subplots import make_subplots
+
+from analysis.interpolation import compute_surface, compute_surfaces, grid_axes
+from analysis.smoothing import DEFAULT_BACKEND
+from telemetry.spans import span, timed
+from view.components.floor_plan import load_floor_plan
+
+# Tamano maximo recomendado del JSON de la figura (bytes)
+FIGURE_PAYLOAD_BUDGET = 2 * 1024 * 1024
+
+# Sigma del suavizado definido para el grid de referencia (300 celdas)
+REFERENCE_RESOLUTION = 300
+
+# Niveles de cuantizacion del modo compacto (0 = sin datos / transparente)
+QUANT_LEVELS = 255
+
+# Las zonas con valor normalizado muy bajo se hacen transparentes
+THRESHOLD_NORM = 0.05
+
+# ========================================
+# Colorscale personalizada estilo eye-tracking
+# ========================================
+COLORSCALE_EYETRACKING = [
+    [0.0, "rgba(0, 128, 0, 0.0)"],      # Transparente
+    [0.15, "rgba(0, 128, 0, 0.3)"],      # Verde suave
+    [0.3, "rgba(0, 200, 0, 0.5)"],       # Verde
+    [0.45, "rgba(144, 238, 0, 0.6)"],    # Verde-amarillo
+    [0.6, "rgba(255, 255, 0, 0.7)"],     # Amarillo
+    [0.75, "rgba(255, 165, 0, 0.8)"],    # Naranja
+    [0.9, "rgba(255, 69, 0, 0.85)"],     # Rojo-naranja
+    [1.0, "rgba(255, 0, 0, 0.9)"],       # Rojo intenso
+]
 
 def toImgCoord(x, y, width=100, height=100, margin_x=0, margin_y=0):
     x = np.asarray(x)
@@ -33,18 +62,124 @@ def toImgCoord(x, y, width=100, height=100, margin_x=0, margin_y=0):
 
     return x_px, y_px
 
-def create_heatmap(points, background_image=None, width=900, height=600):
+def figure_payload_size(fig):
+    # Bytes del JSON que se envia al navegador, total y por traza
+    fig_dict = fig.to_dict()
+    sizes = {
+        f"{i}:{trace['type']}": len(to_json_plotly(trace))
+        for i, trace in enumerate(fig_dict["data"])
+    }
+    sizes["layout"] = len(to_json_plotly(fig_dict["layout"]))
+    sizes["total"] = len(to_json_plotly(fig_dict))
+    return sizes
+
+def adaptive_resolution(render_width, cell_px=3, min_resolution=32, max_resolution=REFERENCE_RESOLUTION):
+    # Celdas del grid segun el ancho renderizado (cell_px pixeles por celda)
+    return int(np.clip(render_width // cell_px, min_resolution, max_resolution))
+
+def quantize(z, zmin, zmax, levels=QUANT_LEVELS):
+    # float -> uint8: 0 para NaN, 1..levels para [zmin, zmax]
+    codes = np.zeros(z.shape, dtype=np.uint8)
+    valid = ~np.isnan(z)
+    if zmax > zmin:
+        scaled = (np.clip(z[valid], zmin, zmax) - zmin) / (zmax - zmin)
+        codes[valid] = 1 + np.round(scaled * (levels - 1)).astype(np.uint8)
+    else:
+        codes[valid] = levels
+    return codes
+
+def rssi_ticks(zmin, zmax):
+    if zmin == zmax:
+        tickvals = [int(np.round(zmin))]
+    else:
+        ticks = np.linspace(zmin, zmax, num=5)
+        tickvals = sorted(set(int(np.round(v)) for v in ticks))
+    ticktext = [str(v) for v in tickvals]
+    return tickvals, ticktext
+
+def quantized_ticks(tickvals, zmin, zmax):
+    if zmax > zmin:
+        return [1 + (v - zmin) / (zmax - zmin) * (QUANT_LEVELS - 1) for v in tickvals]
+    return [QUANT_LEVELS]
+
+def mask_low_values(zi_smooth, zmin, zmax):
+    # Normalizar para mascara de transparencia
+    with np.errstate(invalid="ignore", divide="ignore"):
+        zi_norm = (zi_smooth - zmin) / (zmax - zmin)
+    zi_norm = np.clip(zi_norm, 0, 1)
+    return np.where(zi_norm > THRESHOLD_NORM, zi_smooth, np.nan)
+
+def add_background(fig, img_base64, width, height):
+    fig.add_layout_image(
+        dict(
+            source=img_base64,
+            x=0, y=0,
+            sizex=width, sizey=height,
+            xref="x", yref="y",
+            sizing="stretch",
+            layer="below",
+            opacity=1.0,
+        )
+    )
+
+def batched_surfaces(x_px, y_px, values, width, height, resolution, sigma, fill_value):
+    # values: (n_superficies, n_puntos), NaN donde no hay medida. Las superficies con el
+    # mismo conjunto de puntos medidos comparten interpolacion y un solo gaussian_filter;
+    # las que no tienen ningun punto quedan a NaN
+    present = ~np.isnan(values)
+    zi_smooth = np.full((len(values), resolution, resolution), np.nan)
+    xi, yi = grid_axes(width, height, resolution)
+
+    for mask in np.unique(present, axis=0):
+        if not mask.any():
+            continue
+        idx = np.flatnonzero((present == mask).all(axis=1))
+        with span("compute_surfaces", surfaces=len(idx), points=int(mask.sum())):
+            surfaces = compute_surfaces(
+                x_px[mask], y_px[mask], values[idx][:, mask].T,
+                width=width, height=height, resolution=resolution, sigma=sigma, fill_value=fill_value,
+            )
+        xi, yi = surfaces["xi"], surfaces["yi"]
+        zi_smooth[idx] = surfaces["zi_smooth"]
+
+    return xi, yi, zi_smooth
+
+def plan_layout(width, height, render_width):
+    return dict(
+        title=dict(text=""),
+        xaxis=dict(
+            range=[0, width],
+            visible=False,
+            scaleanchor="y",
+            constrain="domain",
+            domain=[0, 1],
+        ),
+        yaxis=dict(
+            range=[height, 0],  # Invertir Y para que coincida con imagen
+            visible=False,
+            constrain="domain",
+            domain=[0, 1],
+        ),
+        width=render_width,
+        height=int(render_width * height / width),
+        margin=dict(l=0, r=0, t=10, b=0),
+        plot_bgcolor="white",
+    )
+
+@timed("create_heatmap")
+def create_heatmap(points, background_image=None, width=900, height=600,
+                   render_width=900, cell_px=3, compact=False, label="RSSI", unit="dBm",
+                   smoothing=DEFAULT_BACKEND, nan_aware=False):
     # ========================================
     # Imagen de fondo opcional
     # ========================================
+    # Decodificada y reescalada una sola vez por contenido (cache por hash)
     img_base64 = None
     if background_image is not None:
-        img = Image.open(background_image)
-        width, height = img.size
-
-        buffer = BytesIO()
-        img.save(buffer, format="PNG")
-        img_base64 = "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+        with span("floor_plan"):
+            plan = load_floor_plan(background_image, max_display_width=2 * render_width)
+        width, height = plan["width"], plan["height"]
+        img_base64 = plan["data_uri"]
     
     # ========================================
     # Convertir coordenadas a px imagen
@@ -60,65 +195,53 @@ def create_heatmap(points, background_image=None, width=900, height=600):
     # ========================================
     # Interpolacion + suavizado gaussiano
     # ========================================
-    resolution = 300  # resolucion del grid
-
-    xi = np.linspace(0, width, resolution)
-    yi = np.linspace(0, height, resolution)
-    xi_grid, yi_grid = np.meshgrid(xi, yi)
+    # resolucion del grid adaptada al ancho renderizado (300 para 900 px a 3 px/celda)
+    resolution = adaptive_resolution(render_width, cell_px)
 
     # Rango RSSI fijo para colores y normalizacion
     # zmin, zmax = -80.0, 0.0
     zmin, zmax = rssi.min(), rssi.max()
-    if zmin == zmax:
-        tickvals = [int(np.round(zmin))]
-    else:
-        ticks = np.linspace(zmin, zmax, num=5)
-        tickvals = sorted(set(int(np.round(v)) for v in ticks))
-    ticktext = [str(v) for v in tickvals]
-
-    # Interpolar valores en todo el grid
-    interp_method = "cubic" if len(x_px) >= 4 else ("linear" if len(x_px) >= 3 else "nearest")
-    try:
-        zi = griddata((x_px, y_px), rssi, (xi_grid, yi_grid), method=interp_method, fill_value=zmin)
-    except Exception as e:
-        # fallback to nearest if even linear fails
-        zi = griddata((x_px, y_px), rssi, (xi_grid, yi_grid), method="nearest", fill_value=zmin)
+    tickvals, ticktext = rssi_ticks(zmin, zmax)
 
-    # Aplicar suavizado gaussiano (sigma alto = mas difuminado, estilo eye-tracking)
+    # Interpolar RSSI y coordenadas reales (hover) en una sola pasada sobre el grid,
+    # aplicando suavizado gaussiano (sigma alto = mas difuminado, estilo eye-tracking).
+    # El resultado se memoiza por (puntos, resolucion, metodo, sigma).
     sigma = 10  # Ajusta: mas alto -> mas suave y difuminado
-    zi_smooth = gaussian_filter(zi, sigma=sigma)
-
-    # Normalizar para mascara de transparencia
-    zi_norm = (zi_smooth - zmin) / (zmax - zmin)
-    zi_norm = np.clip(zi_norm, 0, 1)
+    # sigma en celdas, escalado para mantener el mismo difuminado a cualquier resolucion
+    sigma = sigma * resolution / REFERENCE_RESOLUTION
+    with span("compute_surface", points=len(points), resolution=resolution):
+        surface = compute_surface(
+            x_px, y_px, [x, y, rssi],
+            width=width, height=height, resolution=resolution, sigma=sigma,
+            smoothing=smoothing, nan_aware=nan_aware,
+        )
+    xi, yi = surface["xi"], surface["yi"]
+    zi_smooth = surface["zi_smooth"]
 
     # ========================================
     # Crear mascara de transparencia (ocultar zonas sin datos)
     # ========================================
-    # Las zonas con valor muy bajo se hacen transparentes
-    threshold_norm = 0.05
-    zi_display = np.where(zi_norm > threshold_norm, zi_smooth, np.nan)
+    zi_display = mask_low_values(zi_smooth, zmin, zmax)
 
-    # Texto de hover con control de NaN
-    hover_text = np.empty_like(zi_display, dtype=object)
-    mask = np.isnan(zi_display)
-    hover_text[mask] = "RSSI: sin datos"
-    hover_text[~mask] = np.array([f"RSSI: {v:.1f} dBm" for v in zi_display[~mask]])
+    # Modo compacto: z cuantizado a uint8 (viaja como typed array base64);
+    # el colorscale ya es transparente en 0, que es el codigo de "sin datos"
+    z_trace, zmin_trace, zmax_trace = zi_display, zmin, zmax
+    tickvals_trace = tickvals
+    # x, y, valor interpolados al grid (float32) como customdata del hover
+    hover_fields = surface["grid_fields"]
+    hovertemplate = (
+        "X: %{customdata[0]:.2f}<br>"
+        "Y: %{customdata[1]:.2f}<br>"
+        f"{label}: %{{customdata[2]:.1f}} {unit}<extra></extra>"
+    )
+    if compact:
+        z_trace = quantize(zi_display, zmin, zmax)
+        zmin_trace, zmax_trace = 0, QUANT_LEVELS
+        tickvals_trace = quantized_ticks(tickvals, zmin, zmax)
+        # Solo el valor: las coordenadas reales triplicaban el customdata
+        hover_fields = np.ascontiguousarray(hover_fields[..., 2])
+        hovertemplate = f"{label}: %{{customdata:.1f}} {unit}<extra></extra>"
 
-    # ========================================
-    # Colorscale personalizada estilo eye-tracking
-    # ========================================
-    colorscale_eyetracking = [
-        [0.0, "rgba(0, 128, 0, 0.0)"],      # Transparente
-        [0.15, "rgba(0, 128, 0, 0.3)"],      # Verde suave
-        [0.3, "rgba(0, 200, 0, 0.5)"],       # Verde
-        [0.45, "rgba(144, 238, 0, 0.6)"],    # Verde-amarillo
-        [0.6, "rgba(255, 255, 0, 0.7)"],     # Amarillo
-        [0.75, "rgba(255, 165, 0, 0.8)"],    # Naranja
-        [0.9, "rgba(255, 69, 0, 0.85)"],     # Rojo-naranja
-        [1.0, "rgba(255, 0, 0, 0.9)"],       # Rojo intenso
-    ]
-    
     # ========================================
     # Crear figura
     # ========================================
@@ -127,51 +250,30 @@ def create_heatmap(points, background_image=None, width=900, height=600):
 
     # Imagen de fondo (plano)
     if img_base64 is not None:
-        fig.add_layout_image(
-            dict(
-                source=img_base64,
-                x=0, y=0,
-                sizex=width, sizey=height,
-                xref="x", yref="y",
-                sizing="stretch",
-                layer="below",
-                opacity=1.0,
-            )
-        )
-
-    # Heatmap suavizado estilo eye-tracking
-    # Interpolar x, y, rssi al grid para hover
-    from scipy.interpolate import griddata as gd
-    grid_x = gd((x_px, y_px), x, (xi_grid, yi_grid), method=interp_method, fill_value=np.nan)
-    grid_y = gd((x_px, y_px), y, (xi_grid, yi_grid), method=interp_method, fill_value=np.nan)
-    grid_rssi = gd((x_px, y_px), rssi, (xi_grid, yi_grid), method=interp_method, fill_value=np.nan)
-    grid_customdata = np.dstack([grid_x, grid_y, grid_rssi])
+        add_background(fig, img_base64, width, height)
 
+    # Heatmap suavizado estilo eye-tracking; las celdas sin datos (NaN) no muestran hover
     fig.add_trace(go.Heatmap(
         x=xi,
         y=yi,
-        z=zi_display,
-        text=hover_text,
-        colorscale=colorscale_eyetracking,
-        zmin=zmin, zmax=zmax,
+        z=z_trace,
+        colorscale=COLORSCALE_EYETRACKING,
+        zmin=zmin_trace, zmax=zmax_trace,
         opacity=1.0,
         showscale=True,
         colorbar=dict(
-            title=dict(text="RSSI (dBm)", side="right"),
+            title=dict(text=f"{label} ({unit})" if unit else label, side="right"),
             thickness=15,
             len=0.6,
-            tickvals=tickvals,
+            tickvals=tickvals_trace,
             ticktext=ticktext,
             x=1.02,
             xanchor="left",
             y=0.5,
         ),
-        customdata=grid_customdata,
-        hovertemplate=(
-            "X: %{customdata[0]:.2f}<br>"
-            "Y: %{customdata[1]:.2f}<br>"
-            "RSSI: %{customdata[2]:.1f} dBm<extra></extra>"
-        ),
+        customdata=hover_fields,
+        hovertemplate=hovertemplate,
+        hoverongaps=False,
         connectgaps=False,
     ))
 
@@ -186,7 +288,7 @@ def create_heatmap(points, background_image=None, width=900, height=600):
             symbol="circle",
             line=dict(width=2, color="black"),
         ),
-        text=[f"{v:.2f} dBm" for v in rssi],
+        text=np.char.mod(f"%.2f {unit.replace('%', '%%')}", rssi),
         textposition="top center",
         textfont=dict(size=10, color="black"),
         name="Puntos de medicion",
@@ -195,29 +297,12 @@ def create_heatmap(points, background_image=None, width=900, height=600):
             "Punto de medicion<br>"
             "X: %{customdata[0]:.2f}<br>"
             "Y: %{customdata[1]:.2f}<br>"
-            "RSSI: %{customdata[2]:.1f} dBm<extra></extra>"
+            f"{label}: %{{customdata[2]:.1f}} {unit}<extra></extra>"
         ),
     ))
 
     fig.update_layout(
-        title=dict(text=""),
-        xaxis=dict(
-            range=[0, width],
-            visible=False,
-            scaleanchor="y",
-            constrain="domain",
-            domain=[0, 1],
-        ),
-        yaxis=dict(
-            range=[height, 0],  # Invertir Y para que coincida con imagen
-            visible=False,
-            constrain="domain",
-            domain=[0, 1],
-        ),
-        width=900,
-        height=int(900 * height / width),
-        margin=dict(l=0, r=0, t=10, b=0),
-        plot_bgcolor="white",
+        **plan_layout(width, height, render_width),
         # Botones interactivos
         updatemenus=[
             dict(
@@ -262,3 +347,317 @@ def create_heatmap(points, background_image=None, width=900, height=600):
     )
 
     return fig
+
+@timed("create_heatmap_animation")
+def create_heatmap_animation(positions, frame_values, frame_labels, background_image=None,
+                             width=900, height=600, render_width=900, cell_px=6):
+    # Un frame por ventana temporal; todos se envian en una sola figura animada
+    # (z cuantizado a uint8) y la reproduccion no necesita volver al servidor
+    img_base64 = None
+    if background_image is not None:
+        plan = load_floor_plan(background_image, max_display_width=2 * render_width)
+        width, height = plan["width"], plan["height"]
+        img_base64 = plan["data_uri"]
+
+    # Coordenadas px de todas las posiciones: el plano no se mueve entre frames
+    x = positions[:, 0]
+    y = positions[:, 1]
+    x_px, y_px = toImgCoord(x, y, height=height, width=width, margin_x=20, margin_y=20)
+
+    resolution = adaptive_resolution(render_width, cell_px)
+    sigma = 10 * resolution / REFERENCE_RESOLUTION
+
+    # Rango comun a todos los frames para que los colores sean comparables
+    zmin, zmax = np.nanmin(frame_values), np.nanmax(frame_values)
+    tickvals, ticktext = rssi_ticks(zmin, zmax)
+
+    # Frames con el mismo conjunto de posiciones medidas se calculan en lote
+    present = ~np.isnan(frame_values)
+    xi, yi, zi_smooth = batched_surfaces(
+        x_px, y_px, frame_values, width, height, resolution, sigma, fill_value=zmin,
+    )
+    codes = quantize(mask_low_values(zi_smooth, zmin, zmax), zmin, zmax)
+
+    def frame_traces(i):
+        mask = present[i]
+        rssi = frame_values[i, mask]
+        return [
+            go.Heatmap(
+                x=xi, y=yi, z=codes[i],
+                colorscale=COLORSCALE_EYETRACKING,
+                zmin=0, zmax=QUANT_LEVELS,
+                showscale=True,
+                colorbar=dict(
+                    title=dict(text="RSSI (dBm)", side="right"),
+                    thickness=15,
+                    len=0.6,
+                    tickvals=quantized_ticks(tickvals, zmin, zmax),
+                    ticktext=ticktext,
+                    x=1.02,
+                    xanchor="left",
+                    y=0.5,
+                ),
+                hoverinfo="skip",
+            ),
+            go.Scatter(
+                x=x_px[mask], y=y_px[mask],
+                mode="markers+text",
+                marker=dict(
+                    size=12,
+                    color="white",
+                    symbol="circle",
+                    line=dict(width=2, color="black"),
+                ),
+                text=np.char.mod("%.2f dBm", rssi),
+                textposition="top center",
+                textfont=dict(size=10, color="black"),
+                name="Puntos de medicion",
+                customdata=np.column_stack([x[mask], y[mask], rssi]),
+                hovertemplate=(
+                    "Punto de medicion<br>"
+                    "X: %{customdata[0]:.2f}<br>"
+                    "Y: %{customdata[1]:.2f}<br>"
+                    "RSSI: %{customdata[2]:.1f} dBm<extra></extra>"
+                ),
+            ),
+        ]
+
+    fig = go.Figure(
+        data=frame_traces(0),
+        frames=[
+            go.Frame(data=frame_traces(i), name=label, traces=[0, 1])
+            for i, label in enumerate(frame_labels)
+        ],
+    )
+
+    if img_base64 is not None:
+        add_background(fig, img_base64, width, height)
+
+    frame_args = dict(mode="immediate", frame=dict(duration=500, redraw=True), transition=dict(duration=0))
+    fig.update_layout(
+        **plan_layout(width, height, render_width),
+        updatemenus=[
+            dict(
+                type="buttons",
+                direction="left",
+                x=0.0, y=1.1,
+                pad=dict(t=10),
+                bgcolor="#2d6cdf",
+                bordercolor="#1f4fbf",
+                font=dict(color="#000000"),
+                buttons=[
+                    dict(label="Play", method="animate", args=[None, dict(frame_args, fromcurrent=True)]),
+                    dict(label="Pause", method="animate", args=[[None], dict(frame_args, mode="immediate")]),
+                ],
+            )
+        ],
+        sliders=[
+            dict(
+                active=0,
+                currentvalue=dict(prefix="Ventana: ", suffix=""),
+                pad=dict(t=0, b=15),
+                x=0.05, y=0.0,
+                steps=[
+                    dict(method="animate", args=[[label], frame_args], label=label)
+                    for label in frame_labels
+                ],
+            )
+        ],
+    )
+
+    return fig
+
+def beacon_surfaces(positions, values, width, height, resolution):
+    # values: (n_posiciones, n_beacons) -> superficies apiladas (n_beacons, filas, columnas)
+    # con un rango de color comun; las zonas debiles o sin datos quedan a NaN
+    x_px, y_px = toImgCoord(
+        positions[:, 0], positions[:, 1], height=height, width=width, margin_x=20, margin_y=20,
+    )
+    sigma = 10 * resolution / REFERENCE_RESOLUTION
+    zmin, zmax = np.nanmin(values), np.nanmax(values)
+
+    xi, yi, zi_smooth = batched_surfaces(
+        x_px, y_px, values.T, width, height, resolution, sigma, fill_value=zmin,
+    )
+    return x_px, y_px, xi, yi, mask_low_values(zi_smooth, zmin, zmax), zmin, zmax
+
+@timed("create_heatmap_grid")
+def create_heatmap_grid(positions, values, names, width=900, height=600, render_width=900,
+                        columns=3, cell_px=4):
+    # Small multiples: un heatmap por beacon con la misma escala de color, sin plano de
+    # fondo (la imagen se repetiria en cada subplot)
+    columns = max(1, min(columns, len(names)))
+    rows = -(-len(names) // columns)
+    resolution = adaptive_resolution(render_width / columns, cell_px)
+
+    x_px, y_px, xi, yi, zi_display, zmin, zmax = beacon_surfaces(
+        positions, values, width, height, resolution,
+    )
+    codes = quantize(zi_display, zmin, zmax)
+    tickvals, ticktext = rssi_ticks(zmin, zmax)
+
+    fig = make_subplots(
+        rows=rows, cols=columns, subplot_titles=[str(name) for name in names],
+        horizontal_spacing=0.02, vertical_spacing=0.06,
+    )
+    for i, name in enumerate(names):
+        row, col = i // columns + 1, i % columns + 1
+        measured = ~np.isnan(values[:, i])
+        fig.add_trace(
+            go.Heatmap(x=xi, y=yi, z=codes[i], coloraxis="coloraxis", hoverinfo="skip"),
+            row=row, col=col,
+        )
+        fig.add_trace(
+            go.Scatter(
+                x=x_px[measured], y=y_px[measured], mode="markers",
+                marker=dict(size=5, color="white", line=dict(width=1, color="black")),
+                customdata=np.column_stack([positions[measured], values[measured, i]]),
+                hovertemplate=(
+                    f"{name}<br>"
+                    "X: %{customdata[0]:.2f}<br>"
+                    "Y: %{customdata[1]:.2f}<br>"
+                    "RSSI: %{customdata[2]:.1f} dBm<extra></extra>"
+                ),
+                showlegend=False,
+            ),
+            row=row, col=col,
+        )
+
+    fig.update_xaxes(range=[0, width], visible=False, constrain="domain")
+    fig.update_yaxes(range=[height, 0], visible=False, constrain="domain")
+    for i in range(len(names)):
+        suffix = "" if i == 0 else str(i + 1)
+        fig.layout[f"xaxis{suffix}"].scaleanchor = f"y{suffix}"
+
+    fig.update_layout(
+        coloraxis=dict(
+            colorscale=COLORSCALE_EYETRACKING,
+            cmin=0, cmax=QUANT_LEVELS,
+            colorbar=dict(
+                title=dict(text="RSSI (dBm)", side="right"),
+                thickness=15,
+                len=0.6,
+                tickvals=quantized_ticks(tickvals, zmin, zmax),
+                ticktext=ticktext,
+            ),
+        ),
+        width=render_width,
+        height=int(rows * render_width / columns * height / width) + 40 * rows,
+        margin=dict(l=0, r=0, t=30, b=0),
+        plot_bgcolor="white",
+    )
+
+    return fig
+
+def beacon_colorscale(n):
+    # Escala discreta: un color solido por indice de beacon (0..n-1)
+    colors = (qualitative.Plotly + qualitative.Dark24)[:max(n, 1)]
+    colors = [colors[i % len(colors)] for i in range(n)]
+    if n == 1:
+        return [[0.0, colors[0]], [1.0, colors[0]]]
+    scale = []
+    for i, color in enumerate(colors):
+        scale += [[i / n, color], [(i + 1) / n, color]]
+    return scale
+
+@timed("create_coverage_map")
+def create_coverage_map(positions, values, names, background_image=None, width=900, height=600,
+                        render_width=900, cell_px=6):
+    # Cobertura: mejor RSSI por celda y beacon que lo proporciona, a partir de las
+    # superficies de todos los beacons calculadas en lote
+    img_base64 = None
+    if background_image is not None:
+        with span("floor_plan"):
+            plan = load_floor_plan(background_image, max_display_width=2 * render_width)
+        width, height = plan["width"], plan["height"]
+        img_base64 = plan["data_uri"]
+
+    resolution = adaptive_resolution(render_width, cell_px)
+    x_px, y_px, xi, yi, zi_display, zmin, zmax = beacon_surfaces(
+        positions, values, width, height, resolution,
+    )
+
+    covered = ~np.isnan(zi_display).all(axis=0)
+    best = np.where(covered, np.nanmax(np.where(covered, zi_display, zmin), axis=0), np.nan)
+    strongest = np.full(best.shape, np.nan)
+    strongest[covered] = np.nanargmax(np.where(np.isnan(zi_display), -np.inf, zi_display), axis=0)[covered]
+
+    best_values = np.nanmax(values, axis=1)
+    tickvals, ticktext = rssi_ticks(zmin, zmax)
+    n = len(names)
+
+    fig = go.Figure()
+    if img_base64 is not None:
+        add_background(fig, img_base64, width, height)
+
+    fig.add_trace(go.Heatmap(
+        x=xi, y=yi, z=quantize(best, zmin, zmax),
+        colorscale=COLORSCALE_EYETRACKING,
+        zmin=0, zmax=QUANT_LEVELS,
+        colorbar=dict(
+            title=dict(text="Best RSSI (dBm)", side="right"),
+            thickness=15,
+            len=0.6,
+            tickvals=quantized_ticks(tickvals, zmin, zmax),
+            ticktext=ticktext,
+            x=1.02,
+            xanchor="left",
+            y=0.5,
+        ),
+        hoverinfo="skip",
+        name="Best RSSI",
+    ))
+    fig.add_trace(go.Heatmap(
+        x=xi, y=yi, z=strongest,
+        colorscale=beacon_colorscale(n),
+        zmin=-0.5, zmax=n - 0.5,
+        opacity=0.6,
+        colorbar=dict(
+            title=dict(text="Strongest beacon", side="right"),
+            thickness=15,
+            len=0.6,
+            tickvals=list(range(n)),
+            ticktext=[str(name) for name in names],
+            x=1.02,
+            xanchor="left",
+            y=0.5,
+        ),
+        hoverinfo="skip",
+        name="Strongest beacon",
+        visible=False,
+    ))
+    fig.add_trace(go.Scatter(
+        x=x_px, y=y_px,
+        mode="markers",
+        marker=dict(size=10, color="white", symbol="circle", line=dict(width=2, color="black")),
+        name="Puntos de medicion",
+        customdata=np.column_stack([positions, best_values, np.nanargmax(values, axis=1)]),
+        text=[str(names[i]) for i in np.nanargmax(values, axis=1)],
+        hovertemplate=(
+            "Punto de medicion<br>"
+            "X: %{customdata[0]:.2f}<br>"
+            "Y: %{customdata[1]:.2f}<br>"
+            "Best RSSI: %{customdata[2]:.1f} dBm (%{text})<extra></extra>"
+        ),
+    ))
+
+    fig.update_layout(
+        **plan_layout(width, height, render_width),
+        updatemenus=[
+            dict(
+                type="buttons",
+                direction="left",
+                x=0.0, y=1.1,
+                pad=dict(t=10),
+                bgcolor="#2d6cdf",
+                bordercolor="#1f4fbf",
+                font=dict(color="#000000"),
+                buttons=[
+                    dict(label="Mejor RSSI", method="update", args=[{"visible": [True, False, True]}]),
+                    dict(label="Beacon dominante", method="update", args=[{"visible": [False, True, True]}]),
+                ],
+            )
+        ],
+    )
+
+    return fig
@@ -0,0 +1,17 @@
+import pandas as pd
+import streamlit as st
+
+def render_timings(spans):
+    with st.sidebar.expander("Timings", expanded=False):
+        if not spans:
+            st.caption("No spans recorded in this rerun.")
+            return
+
+        # Arbol de spans en preorden, indentado por profundidad
+        rows = pd.DataFrame({
+            "Span": ["· " * s["depth"] + s["name"] for s in spans],
+            "ms": [round(s.get("duration_s", 0.0) * 1000, 1) for s in spans],
+        })
+        total = sum(s.get("duration_s", 0.0) for s in spans if s["depth"] == 0)
+        st.caption(f"Instrumented time: {total * 1000:.0f} ms")
+        st.dataframe(rows, hide_index=True, width='stretch')
@@ -3,81 +3,374 @@ import streamlit as st
 from pathlib import Path
 import pandas as pd
 
-from view.components.heatmap import create_heatmap
+from analysis.smoothing import BACKENDS as SMOOTHING_BACKENDS
+from analysis.timeline import window_frames
+from store import duckdb_engine
+from store.cache import get_dataset
+from store.catalog import dataset_entry
+from store.cube import cube_dimensions, cube_matrix, cube_slice, load_cube
+from store.ingest import ROBOMAP_COLUMNS
+from store.preview import read_rows
+from store.live import get_live_source, live_frame, poll_live_source
+from store.robomap_query import indexed_database, query_position_means
+from telemetry.spans import span
+from view.components.data_table import paginated_table
+from view.components.heatmap import (
+    FIGURE_PAYLOAD_BUDGET,
+    create_coverage_map,
+    create_heatmap,
+    create_heatmap_animation,
+    create_heatmap_grid,
+    figure_payload_size,
+)
 
-from .file_manager import list_files
+from .file_manager import DATABASE_SUFFIX, list_files
+
+# Limite de frames de la animacion (todos viajan en la misma figura)
+MAX_PLAYBACK_FRAMES = 120
+
+# Estadistico del cubo por posicion -> (columna, etiqueta, unidad, escala)
+AGGREGATIONS = {
+    "Mean": ("mean", "RSSI", "dBm", 1),
+    "Median": ("p50", "RSSI median", "dBm", 1),
+    "P10": ("p10", "RSSI p10", "dBm", 1),
+    "P90": ("p90", "RSSI p90", "dBm", 1),
+    "Std": ("std", "RSSI std", "dB", 1),
+    "Samples": ("count", "Samples", "", 1),
+    "Packet loss": ("loss", "Packet loss", "%", 100),
+}
+# Estadisticos de RSSI comparables entre beacons (mayor = mejor senal)
+RSSI_AGGREGATIONS = ["Mean", "Median", "P10", "P90"]
+
+# Anchos del heatmap (px): la resolucion del grid se adapta al ancho elegido
+CHART_WIDTHS = [600, 900, 1200, 1600]
+DEFAULT_CHART_WIDTH = 900
+
+VIEWS = ["Single beacon", "Small multiples", "Coverage"]
+# Beacons seleccionados por defecto en las vistas multi-beacon
+MAX_DEFAULT_BEACONS = 12
 
 def select_dataset():
-    selected_dataset = st.selectbox("Choose a dataset", options=[Path(f).name for f in list_files()])
+    files = list_files()
+    selected_dataset = st.selectbox("Choose a dataset", options=[Path(f).name for f in files])
     
     if selected_dataset:
-        selected_file = next((f for f in list_files() if f.name == selected_dataset), None)
+        selected_file = next((f for f in files if f.name == selected_dataset), None)
         if selected_file:
-            df = pd.read_csv(selected_file)
-
-            return df
+            return selected_file
     return None
 
+def select_filters(dimensions):
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        beacon_options = dimensions["Mac"]
+        beacon_default = "P2" if "P2" in beacon_options else (beacon_options[0] if beacon_options else None)
+        selected_beacon = st.selectbox(
+            "Mac",
+            beacon_options,
+            index=beacon_options.index(beacon_default) if beacon_default in beacon_options else 0,
+        )
+
+    with col2:
+        channel_options = dimensions["Channel"]
+        channel_default = 37 if 37 in channel_options else (channel_options[0] if channel_options else None)
+        selected_channel = st.selectbox(
+            "Channel",
+            channel_options,
+            index=channel_options.index(channel_default) if channel_default in channel_options else 0,
+        )
+
+    with col3:
+        protocol_options = dimensions["Protocol"]
+        protocol_default = protocol_options[0] if protocol_options else None
+        selected_protocol = st.selectbox(
+            "Protocol",
+            protocol_options,
+            index=protocol_options.index(protocol_default) if protocol_default in protocol_options else 0,
+        )
+
+    return selected_beacon, selected_channel, selected_protocol
+
+def select_chart_width(key=None):
+    return st.select_slider("Chart width (px)", CHART_WIDTHS, value=DEFAULT_CHART_WIDTH, key=key)
+
+def select_statistic(cube, names=None):
+    # Cubos antiguos pueden no tener todas las columnas (p.ej. loss)
+    options = [
+        name for name, (column, *_) in AGGREGATIONS.items()
+        if column in cube.columns and (names is None or name in names)
+    ]
+    return AGGREGATIONS[st.selectbox("Statistic", options)]
+
+def cube_points(cube, beacon, channel, protocol, statistic):
+    column, label, unit, scale = statistic
+    df_filtered = cube_slice(cube, beacon, channel, protocol, statistic=column).dropna(subset=[column])
+    puntos = df_filtered[["Position_x", "Position_y", column]].to_numpy(dtype="float64")
+    puntos[:, 2] *= scale
+    return puntos, {"label": label, "unit": unit}
+
+def render_beacons(cube, dimensions, view, background_image):
+    col1, col2 = st.columns(2)
+    with col1:
+        channel_options = dimensions["Channel"]
+        selected_channel = st.selectbox(
+            "Channel", channel_options,
+            index=channel_options.index(37) if 37 in channel_options else 0,
+        )
+    with col2:
+        selected_protocol = st.selectbox("Protocol", dimensions["Protocol"])
+
+    selected_macs = st.multiselect("Macs", dimensions["Mac"], default=dimensions["Mac"][:MAX_DEFAULT_BEACONS])
+    column = select_statistic(cube, RSSI_AGGREGATIONS)[0]
+    if not selected_macs:
+        st.warning("Please select at least one Mac.")
+        return
+
+    with span("filter"):
+        positions, values = cube_matrix(cube, selected_macs, selected_channel, selected_protocol, column)
+    if len(positions) == 0:
+        st.warning("No measurements for the selected Macs, Channel and Protocol.")
+        return
+
+    if view == "Small multiples":
+        columns = st.slider("Columns", min_value=1, max_value=6, value=min(3, len(selected_macs)))
+        fig = create_heatmap_grid(positions, values, selected_macs, columns=columns)
+    else:
+        fig = create_coverage_map(positions, values, selected_macs, background_image=background_image)
+
+    with span("plotly_chart"):
+        st.plotly_chart(fig, width='stretch')
+
+def render_playback(df_filtered, background_image):
+    col_window, col_step = st.columns(2)
+    with col_window:
+        window_minutes = st.number_input("Window (minutes)", min_value=1, value=10)
+    with col_step:
+        step_minutes = st.number_input("Step (minutes)", min_value=1, value=5)
+
+    with span("window_frames"):
+        frames = window_frames(
+            df_filtered,
+            window=pd.Timedelta(minutes=window_minutes),
+            step=pd.Timedelta(minutes=step_minutes),
+        )
+
+    n_frames = len(frames["starts"])
+    if n_frames == 0:
+        st.warning("No timestamped measurements for the selected Mac, Channel and Protocol.")
+        return
+    if n_frames > MAX_PLAYBACK_FRAMES:
+        st.warning(f"{n_frames} frames exceed the limit of {MAX_PLAYBACK_FRAMES}. Increase the step.")
+        return
+
+    labels = [f"{start:%Y-%m-%d %H:%M} - {end:%H:%M}" for start, end in zip(frames["starts"], frames["ends"])]
+    fig = create_heatmap_animation(
+        frames["positions"], frames["means"], labels, background_image=background_image,
+    )
+    st.plotly_chart(fig, width='stretch')
+
+def render_live(background_image):
+    db_path = st.text_input("Robomap database (.sqlite3)")
+    interval = st.number_input("Refresh interval (seconds)", min_value=1, value=5)
+
+    if not db_path or not Path(db_path).exists():
+        st.warning("Please enter the path of an existing robomap database.")
+        return
+
+    source = get_live_source(db_path)
+
+    # Solo se re-ejecuta este fragmento: lee el delta y redibuja el heatmap
+    @st.fragment(run_every=interval)
+    def live_heatmap():
+        new_rows = poll_live_source(source)
+        st.caption(f"{source['rows']} readings ingested ({new_rows} new), last Id {source['high_water_mark']}")
+
+        cube = source["cube"]
+        if cube is None:
+            st.info("Waiting for readings...")
+            return
+
+        selected_beacon, selected_channel, selected_protocol = select_filters(cube_dimensions(cube))
+        statistic = select_statistic(cube)
+        render_width = select_chart_width("live_chart_width")
+        puntos, labels = cube_points(cube, selected_beacon, selected_channel, selected_protocol, statistic)
+
+        if len(puntos) == 0:
+            st.warning("No measurements for the selected Mac, Channel and Protocol.")
+        else:
+            fig = create_heatmap(
+                puntos, background_image=background_image,
+                render_width=render_width, compact=True, cell_px=6, **labels,
+            )
+            st.plotly_chart(fig, width="content")
+
+        with st.expander("Latest readings"):
+            st.dataframe(live_frame(source).tail(100))
+
+    live_heatmap()
+
+def render_database(selected_file, entry, background_image):
+    # Consulta directa sobre la base de datos robomap: solo se lee la porcion que se pinta
+    db_path = indexed_database(selected_file)
+
+    selected_beacon, selected_channel, selected_protocol = select_filters(entry["dimensions"])
+
+    start, end = None, None
+    if entry["time_range"] is not None:
+        first, last = entry["time_range"]
+        first, last = pd.Timestamp(first).to_pydatetime(), pd.Timestamp(last).to_pydatetime()
+        if first < last:
+            start, end = st.slider("Time range", min_value=first, max_value=last, value=(first, last))
+            # El extremo final se incluye
+            end = pd.Timestamp(end) + pd.Timedelta(seconds=1)
+
+    with span("query_position_means"):
+        df_filtered = query_position_means(
+            db_path, selected_beacon, selected_channel, selected_protocol, start=start, end=end,
+        )
+    puntos = df_filtered[["Position_x", "Position_y", "RSSI"]].values
+
+    if len(puntos) == 0:
+        st.warning("No measurements for the selected Mac, Channel, Protocol and time range.")
+    else:
+        render_width = select_chart_width()
+        fig = create_heatmap(
+            puntos, background_image=background_image, render_width=render_width, compact=True, cell_px=6,
+        )
+        st.plotly_chart(fig, width="content")
+
 def render():
     st.header("Dashboard")
     
-    selected_df = select_dataset()
+    live = st.toggle("Live capture")
+    if live:
+        background_image = st.file_uploader("Background image (PNG)", type=["png"])
+        render_live(background_image)
+        return
+
+    selected_file = select_dataset()
+    use_engine = duckdb_engine.available() and st.toggle("DuckDB engine")
     background_image = st.file_uploader("Background image (PNG)", type=["png"])
-    if selected_df is None:
+    if selected_file is None:
         st.warning("Please select a dataset to view the dashboard.")
+        return
+
+    # Filtros, columnas y rango temporal salen del catalogo, no del fichero
+    with span("catalog"):
+        entry = dataset_entry(selected_file)
+    if entry is None:
+        st.warning(f"Dataset '{selected_file.name}' is no longer available. Refresh the catalog.")
+        return
+    dimensions = entry["dimensions"]
+    if selected_file.suffix == DATABASE_SUFFIX:
+        render_database(selected_file, entry, background_image)
     else:
+        # Con el motor DuckDB el dataset nunca se materializa entero en memoria
+        engine_path = Path(selected_file).parent / duckdb_engine.ENGINE_FILENAME
+        # Heatmap solo con el esquema robomap (no p.ej. con la salida de fingerprinting)
+        has_heatmap = set(ROBOMAP_COLUMNS).issubset(entry["columns"])
+        if use_engine:
+            selected_df = None
+        else:
+            with span("load_dataset"):
+                selected_df = get_dataset(selected_file)
+            if has_heatmap:
+                with span("load_cube"):
+                    cube = load_cube(selected_file)
+
         tabs = st.tabs(["Summary", "Data Preview", "Heatmap"])
         with tabs[0]:
             st.subheader("Summary")
-            st.write(selected_df.describe())
+            with span("summary"):
+                if use_engine:
+                    st.write(duckdb_engine.summary(engine_path, selected_file))
+                else:
+                    st.write(selected_df.describe())
         
         with tabs[1]:
             st.subheader("Data Preview")
-            st.dataframe(selected_df)
+            if use_engine:
+                paginated_table(
+                    lambda *args, **kwargs: duckdb_engine.page(engine_path, selected_file, *args, **kwargs),
+                    duckdb_engine.columns(engine_path, selected_file),
+                    key="dashboard_preview",
+                )
+            else:
+                paginated_table(
+                    lambda *args, **kwargs: read_rows(selected_file, *args, **kwargs),
+                    entry["columns"],
+                    key="dashboard_preview",
+                )
         
         with tabs[2]:
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                beacon_options = sorted(selected_df["Mac"].dropna().unique().tolist())
-                beacon_default = "P2" if "P2" in beacon_options else (beacon_options[0] if beacon_options else None)
-                selected_beacon = st.selectbox(
-                    "Mac",
-                    beacon_options,
-                    index=beacon_options.index(beacon_default) if beacon_default in beacon_options else 0,
-                )
+            if not has_heatmap:
+                missing = [c for c in ROBOMAP_COLUMNS if c not in entry["columns"]]
+                st.warning(f"The heatmap needs the robomap columns, missing {missing}.")
+                return
 
-            with col2:
-                channel_options = sorted(selected_df["Channel"].dropna().unique().tolist())
-                channel_default = 37 if 37 in channel_options else (channel_options[0] if channel_options else None)
-                selected_channel = st.selectbox(
-                    "Channel",
-                    channel_options,
-                    index=channel_options.index(channel_default) if channel_default in channel_options else 0,
-                )
+            # Vistas multi-beacon: todas las superficies en lote, solo desde el cubo
+            view = VIEWS[0] if use_engine else st.radio("View", VIEWS, horizontal=True)
+            if view != VIEWS[0]:
+                render_beacons(cube, dimensions, view, background_image)
+                return
+
+            selected_beacon, selected_channel, selected_protocol = select_filters(dimensions)
 
-            with col3:
-                protocol_options = sorted(selected_df["Protocol"].dropna().unique().tolist())
-                protocol_default = protocol_options[0] if protocol_options else None
-                selected_protocol = st.selectbox(
-                    "Protocol",
-                    protocol_options,
-                    index=protocol_options.index(protocol_default) if protocol_default in protocol_options else 0,
+            # Estadistico por coordenada (x, y): RSSI medio desde el motor o cualquiera del cubo
+            statistic = None if use_engine else select_statistic(cube)
+            with span("filter"):
+                if use_engine:
+                    df_filtered = duckdb_engine.position_means(
+                        engine_path, selected_file, selected_beacon, selected_channel, selected_protocol,
+                    )
+                    puntos = df_filtered[["Position_x", "Position_y", "RSSI"]].values
+                    labels = {}
+                else:
+                    puntos, labels = cube_points(
+                        cube, selected_beacon, selected_channel, selected_protocol, statistic,
+                    )
+
+            if len(puntos) == 0:
+                st.warning("No measurements for the selected Mac, Channel and Protocol.")
+            else:
+                # Modo compacto: z cuantizado a uint8, hover solo con el valor y grid a 6 px/celda
+                compact = st.toggle("Compact heatmap transport", value=True)
+                render_width = select_chart_width()
+                with st.expander("Smoothing"):
+                    smoothing = st.selectbox("Backend", SMOOTHING_BACKENDS)
+                    # Las zonas sin datos no arrastran los bordes hacia el minimo
+                    nan_aware = st.toggle("NaN-aware smoothing")
+                fig = create_heatmap(
+                    puntos, background_image=background_image, render_width=render_width,
+                    compact=compact, cell_px=6 if compact else 3, **labels,
+                    smoothing=smoothing, nan_aware=nan_aware,
                 )
-            
-            # select data
-            df_filtered = selected_df[
-                (selected_df["Channel"] == selected_channel) &\
-                (selected_df["Mac"] == selected_beacon) &\
-                (selected_df["Protocol"] == selected_protocol)
-            ]
-
-            # promediar RSSI por coordenada (x, y)
-            df_filtered = df_filtered.groupby(
-                ["Position_x", "Position_y"],
-                as_index=False,
-            ).agg({"RSSI": "mean"})
-            puntos = df_filtered[["Position_x", "Position_y", "RSSI"]].values
-
-            fig = create_heatmap(puntos, background_image=background_image)
-            st.plotly_chart(fig, width='stretch')
-            
+                # Incluye la serializacion de la figura; se pinta al ancho de la figura
+                with span("plotly_chart"):
+                    st.plotly_chart(fig, width="content")
+
+                if st.checkbox("Show figure payload size"):
+                    payload = figure_payload_size(fig)
+                    st.caption(
+                        f"Figure payload: {payload['total'] / 1024:.0f} KB "
+                        f"(budget {FIGURE_PAYLOAD_BUDGET / 1024:.0f} KB)"
+                    )
+                    if payload["total"] > FIGURE_PAYLOAD_BUDGET:
+                        st.warning("Figure payload exceeds the budget.")
+                    st.json(payload, expanded=False)
+
+                if "Date_hour" in entry["columns"] and st.toggle("Time playback"):
+                    columns = ["Position_x", "Position_y", "RSSI", "Date_hour"]
+                    if use_engine:
+                        rows = duckdb_engine.filtered_rows(
+                            engine_path, selected_file,
+                            selected_beacon, selected_channel, selected_protocol, columns,
+                        )
+                    else:
+                        rows = selected_df.loc[
+                            (selected_df["Channel"] == selected_channel)
+                            & (selected_df["Mac"] == selected_beacon)
+                            & (selected_df["Protocol"] == selected_protocol),
+                            columns,
+                        ]
+                    render_playback(rows, background_image)
@@ -2,28 +2,79 @@
 import logging
 from pathlib import Path
 import streamlit as st
-import pandas as pd
 
-def list_files():
+from store.cache import invalidate
+from store.catalog import (
+    DATABASE_SUFFIX, catalog_dataset, dataset_entry, load_catalog, rebuild_catalog, refresh_catalog,
+)
+from store.columnar import STORE_SUFFIX
+from store.ingest import SchemaError, ingest_csv
+from store.preview import read_rows
+from store.robomap_query import COLUMNS, indexed_database, query_page
+from view.components.data_table import paginated_table
+
+FILE_SUFFIXES = [STORE_SUFFIX, ".csv", DATABASE_SUFFIX]
+
+# Logger configurado en app.py (consola y logs/ips_dashboard.log)
+logger = logging.getLogger("ips_dashboard")
+
+def data_dir():
     project_dir = Path(__file__).parent.parent.parent.parent
-    data_dir = project_dir / Path("data/uploaded_files")
+    return project_dir / Path("data/uploaded_files")
 
-    if not data_dir.exists():
-        logging.warning(f"Data directory does not exist: {data_dir}")
+def scan_files():
+    directory = data_dir()
+
+    if not directory.exists():
+        logger.warning("Data directory does not exist: %s", directory)
         return []
 
-    files = list(data_dir.glob("*.csv"))
-    logging.info(f"Found {len(files)} files in {data_dir}")
+    files = [path for suffix in FILE_SUFFIXES for path in sorted(directory.glob(f"*{suffix}"))]
+    logger.info("Found %d files in %s", len(files), directory)
     return files
 
+def list_files():
+    # Solo se lee el catalogo; el directorio se recorre si aun no existe
+    directory = data_dir()
+    catalog = load_catalog(directory)
+    if catalog is None:
+        if not directory.exists():
+            logger.warning("Data directory does not exist: %s", directory)
+            return []
+        catalog = rebuild_catalog(directory, scan_files())
+    else:
+        # Ficheros borrados o reescritos fuera de la app desde la ultima lectura
+        catalog = refresh_catalog(directory, catalog)
+
+    names = sorted(catalog, key=lambda name: (FILE_SUFFIXES.index(Path(name).suffix), name))
+    return [directory / name for name in names]
+
 def load_file(uploaded_file):
-    project_dir = Path(__file__).parent.parent.parent.parent
+    output_path = data_dir() / uploaded_file.name
+
+    # Se procesa por chunks para no materializar el CSV entero como DataFrame
+    progress_bar = st.progress(0.0, text="Uploading...")
+    output_path, cube_file, rows, kind = ingest_csv(
+        uploaded_file, output_path,
+        progress=lambda fraction, rows: progress_bar.progress(fraction, text=f"{rows:,} rows written"),
+    )
+    progress_bar.empty()
 
-    output_path = project_dir / Path("data/uploaded_files") / uploaded_file.name
+    invalidate(output_path)
+    if cube_file is not None:
+        invalidate(cube_file)
+    catalog_dataset(output_path)
 
-    pd.read_csv(uploaded_file).to_csv(output_path, index=False)
-    
-    logging.info(f"File saved to: {output_path}")
+    logger.info("File saved to: %s (%d rows, %s schema)", output_path, rows, kind)
+
+def load_database(uploaded_file):
+    # Las bases de datos robomap se guardan tal cual y se consultan con indices
+    output_path = data_dir() / uploaded_file.name
+    output_path.write_bytes(uploaded_file.getvalue())
+    indexed_database(output_path)
+    catalog_dataset(output_path)
+
+    logger.info("Database saved to: %s", output_path)
 
 def load_file_handler(uploaded_file):
 
@@ -31,10 +82,17 @@ def load_file_handler(uploaded_file):
         filename = uploaded_file.name
 
         if Path(filename).suffix in [".csv"]:
-            load_file(uploaded_file)
-            st.success(f"File '{uploaded_file.name}' uploaded successfully!")
+            try:
+                load_file(uploaded_file)
+            except SchemaError as e:
+                st.error(f"Invalid file '{uploaded_file.name}': {e}")
+            else:
+                st.success(f"File '{uploaded_file.name}' uploaded successfully!")
+        elif Path(filename).suffix == DATABASE_SUFFIX:
+            load_database(uploaded_file)
+            st.success(f"Database '{uploaded_file.name}' uploaded successfully!")
         else:
-            st.error("Unsupported file type. Please upload a CSV file.")
+            st.error("Unsupported file type. Please upload a CSV or SQLite file.")
     else:
         st.warning("No file uploaded. Please choose a file to upload.")
 
@@ -61,7 +119,7 @@ def render():
             uploaded_file = st.file_uploader(
                 "Choose a file to load",
                 label_visibility="collapsed",
-                accept_multiple_files=False, type="csv")
+                accept_multiple_files=False, type=["csv", "sqlite3"])
         
         with col_right:
             st.markdown("<div class='db-upload-row'>", unsafe_allow_html=True)
@@ -69,9 +127,27 @@ def render():
                 load_file_handler(uploaded_file)
             st.markdown("</div>", unsafe_allow_html=True)
         
-        option = st.selectbox("Select a file to view", options=[f.name for f in list_files()])
+        files = list_files()
+        option = st.selectbox("Select a file to view", options=[f.name for f in files])
         if option:
-            selected_file = next((f for f in list_files() if f.name == option), None)
-            if selected_file:
-                df = pd.read_csv(selected_file)
-                st.dataframe(df)
+            selected_file = next((f for f in files if f.name == option), None)
+            if selected_file and selected_file.suffix == DATABASE_SUFFIX:
+                db_path = indexed_database(selected_file)
+                paginated_table(
+                    lambda *args, **kwargs: query_page(db_path, *args, **kwargs),
+                    list(COLUMNS), key="file_manager_preview",
+                )
+            elif selected_file:
+                entry = dataset_entry(selected_file)
+                if entry is None:
+                    st.warning(f"File '{selected_file.name}' is no longer available. Refresh the catalog.")
+                else:
+                    paginated_table(
+                        lambda *args, **kwargs: read_rows(selected_file, *args, **kwargs),
+                        entry["columns"], key="file_manager_preview",
+                    )
+
+        # Ficheros copiados a mano al directorio (p.ej. salida del ETL)
+        if st.button("Refresh catalog"):
+            rebuild_catalog(data_dir(), scan_files())
+            st.rerun()